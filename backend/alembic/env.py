@@ -35,6 +35,13 @@ def get_url():
     return settings.DATABASE_URL
 
 
+def include_name(name, type_, parent_names):
+    """Leave the farmer_locations R*Tree (and its shadow tables) to migrations."""
+    if type_ == "table":
+        return not (name or "").startswith("farmer_locations")
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -52,6 +59,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -77,7 +85,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
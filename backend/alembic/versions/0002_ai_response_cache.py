@@ -0,0 +1,46 @@
+"""AI response cache
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_response_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        "ix_ai_response_cache_created_at", "ai_response_cache", ["created_at"]
+    )
+    op.create_index(
+        "ix_ai_response_cache_expires_at", "ai_response_cache", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ai_response_cache_expires_at", table_name="ai_response_cache")
+    op.drop_index("ix_ai_response_cache_created_at", table_name="ai_response_cache")
+    op.drop_table("ai_response_cache")
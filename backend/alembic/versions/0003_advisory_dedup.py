@@ -0,0 +1,113 @@
+"""Advisory dedup key
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import hashlib
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+BATCH = 10000
+
+
+def _day(created_at) -> date:
+    if isinstance(created_at, datetime):
+        return created_at.date()
+    if isinstance(created_at, str):
+        return date.fromisoformat(created_at[:10])
+    return date.today()
+
+
+def upgrade() -> None:
+    op.add_column("advisories", sa.Column("content_hash", sa.String(64)))
+    op.add_column("advisories", sa.Column("day", sa.Date()))
+
+    conn = op.get_bind()
+    advisories = sa.table(
+        "advisories",
+        sa.column("id", sa.Integer),
+        sa.column("farmer_id", sa.Integer),
+        sa.column("text", sa.String),
+        sa.column("severity", sa.String),
+        sa.column("created_at", sa.String),
+        sa.column("content_hash", sa.String),
+        sa.column("day", sa.Date),
+    )
+    set_key = (
+        advisories.update()
+        .where(advisories.c.id == sa.bindparam("row_id"))
+        .values(
+            content_hash=sa.bindparam("h"),
+            severity=sa.bindparam("s"),
+            day=sa.bindparam("d"),
+        )
+    )
+    # backfill the key in id-ordered batches
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(
+                advisories.c.id,
+                advisories.c.text,
+                advisories.c.severity,
+                advisories.c.created_at,
+            )
+            .where(advisories.c.id > last_id)
+            .order_by(advisories.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            set_key,
+            [
+                {
+                    "row_id": row.id,
+                    "h": hashlib.sha256(
+                        " ".join(row.text.split()).encode("utf-8")
+                    ).hexdigest(),
+                    "s": row.severity or "info",
+                    "d": _day(row.created_at),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    # keep the oldest row of each duplicate group
+    oldest = sa.select(sa.func.min(advisories.c.id)).group_by(
+        advisories.c.farmer_id,
+        advisories.c.content_hash,
+        advisories.c.severity,
+        advisories.c.day,
+    )
+    conn.execute(advisories.delete().where(advisories.c.id.not_in(oldest)))
+
+    with op.batch_alter_table("advisories") as batch:
+        batch.alter_column("content_hash", existing_type=sa.String(64), nullable=False)
+        batch.alter_column("day", existing_type=sa.Date(), nullable=False)
+    op.create_index(
+        "uq_advisories_dedup",
+        "advisories",
+        ["farmer_id", "content_hash", "severity", "day"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_advisories_dedup", table_name="advisories")
+    with op.batch_alter_table("advisories") as batch:
+        batch.drop_column("day")
+        batch.drop_column("content_hash")
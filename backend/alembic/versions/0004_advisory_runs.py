@@ -0,0 +1,40 @@
+"""Advisory runs
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "advisory_runs",
+        sa.Column("farmer_id", sa.Integer(), nullable=False),
+        sa.Column("forecast_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("profile_fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("advisories", sa.JSON(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["farmer_id"], ["farmers.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("farmer_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("advisory_runs")
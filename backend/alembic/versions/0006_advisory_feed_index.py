@@ -0,0 +1,35 @@
+"""Advisory feed index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # CURRENT_TIMESTAMP defaults were stored without fractional seconds;
+        # pad them so text comparison agrees with the ORM's bound datetimes
+        op.execute(
+            "UPDATE advisories SET created_at = created_at || '.000000' "
+            "WHERE length(created_at) = 19"
+        )
+    op.create_index(
+        "ix_advisories_farmer_created",
+        "advisories",
+        ["farmer_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_advisories_farmer_created", table_name="advisories")
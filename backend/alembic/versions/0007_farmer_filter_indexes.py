@@ -0,0 +1,32 @@
+"""Farmer list filter indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_farmers_language_id": ["language", "id"],
+    "ix_farmers_soil_type_id": ["soil_type", "id"],
+    "ix_farmers_irrigation_type_id": ["irrigation_type", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, "farmers", columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.drop_index(name, table_name="farmers")
@@ -0,0 +1,44 @@
+"""Activity log index
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {c["name"] for c in inspector.get_columns("activities")}
+    if "at" not in columns:
+        # 0001 named the column created_at; the model has always used `at`
+        with op.batch_alter_table("activities") as batch:
+            batch.alter_column(
+                "created_at", new_column_name="at", existing_type=sa.DateTime()
+            )
+    if bind.dialect.name == "sqlite":
+        # CURRENT_TIMESTAMP defaults were stored without fractional seconds;
+        # pad them so text comparison agrees with the ORM's bound datetimes
+        op.execute("UPDATE activities SET at = at || '.000000' WHERE length(at) = 19")
+    # the composite index leads with farmer_id, so it replaces the
+    # single-column one create_all used to make
+    indexes = {i["name"] for i in inspector.get_indexes("activities")}
+    if "ix_activities_farmer_id" in indexes:
+        op.drop_index("ix_activities_farmer_id", table_name="activities")
+    op.create_index("ix_activities_farmer_at", "activities", ["farmer_id", "at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_activities_farmer_at", table_name="activities")
+    op.create_index("ix_activities_farmer_id", "activities", ["farmer_id"])
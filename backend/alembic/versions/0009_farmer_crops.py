@@ -0,0 +1,102 @@
+"""Normalized farmer crops
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+BATCH = 10000
+
+# The crop registry (app/services/crops.py and kb/crops) as of this
+# revision, frozen so later edits to either cannot change what it writes:
+# aliases that are not already their crop's key, by normalized name.
+ALIASES = {
+    "bananas": "banana",
+    "plantain": "banana",
+    "plantains": "banana",
+    "nendran": "banana",
+    "robusta": "banana",
+    "poovan": "banana",
+    "vazha": "banana",
+    "വാഴ": "banana",
+    "നേന്ത്രൻ": "banana",
+    "നേന്ത്രവാഴ": "banana",
+    "paddy": "rice",
+    "paddy rice": "rice",
+    "jyothi": "rice",
+    "uma": "rice",
+    "നെല്ല്": "rice",
+    "നെൽ": "rice",
+    "അരി": "rice",
+}
+SEPARATORS = re.compile(r"[,;/|\n]+")
+
+
+def crop_keys(crops):
+    """Canonical keys in a crops string, de-duplicated, in order."""
+    keys = []
+    for name in SEPARATORS.split(crops):
+        if name.strip():
+            normalized = " ".join(
+                unicodedata.normalize("NFKC", name).casefold().split()
+            )
+            keys.append(ALIASES.get(normalized, normalized))
+    return list(dict.fromkeys(keys))
+
+
+def upgrade() -> None:
+    farmer_crops = op.create_table(
+        "farmer_crops",
+        sa.Column("farmer_id", sa.Integer(), nullable=False),
+        sa.Column("crop_key", sa.String(200), nullable=False),
+        sa.Column("area_ha", sa.Float(), nullable=True),
+        sa.Column("season", sa.String(20), nullable=True),
+        sa.ForeignKeyConstraint(["farmer_id"], ["farmers.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("farmer_id", "crop_key"),
+    )
+
+    # Backfill from the crops strings, names resolved to canonical keys
+    bind = op.get_bind()
+    farmers = sa.table("farmers", sa.column("id"), sa.column("crops"))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(farmers.c.id, farmers.c.crops)
+            .where(farmers.c.id > last_id, farmers.c.crops.is_not(None))
+            .order_by(farmers.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        op.bulk_insert(
+            farmer_crops,
+            [
+                {"farmer_id": farmer_id, "crop_key": key}
+                for farmer_id, crops in rows
+                for key in crop_keys(crops)
+            ],
+        )
+        last_id = rows[-1][0]
+
+    op.create_index(
+        "ix_farmer_crops_crop_farmer", "farmer_crops", ["crop_key", "farmer_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_farmer_crops_crop_farmer", table_name="farmer_crops")
+    op.drop_table("farmer_crops")
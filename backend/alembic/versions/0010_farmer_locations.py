@@ -0,0 +1,153 @@
+"""Farmer geohash and location index
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+BATCH = 10000
+
+# geohash as app/services/geo.py wrote it at this revision, frozen here
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 8
+
+
+def geohash(lat, lon):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < GEOHASH_PRECISION:
+        # bits alternate between longitude and latitude, longitude first
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+# SQLite only: the farmer_locations R*Tree and the triggers that keep it in
+# step with farmers (as in app/models/farmer_location.py)
+SQLITE_CREATE = (
+    "CREATE VIRTUAL TABLE farmer_locations "
+    "USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """
+    CREATE TRIGGER farmers_location_insert
+    AFTER INSERT ON farmers
+    WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+    BEGIN
+        INSERT INTO farmer_locations
+        VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+    END
+    """,
+    """
+    CREATE TRIGGER farmers_location_update
+    AFTER UPDATE OF latitude, longitude ON farmers
+    WHEN NEW.latitude IS NOT OLD.latitude OR NEW.longitude IS NOT OLD.longitude
+    BEGIN
+        DELETE FROM farmer_locations WHERE id = OLD.id;
+        INSERT INTO farmer_locations
+        SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+        WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER farmers_location_delete
+    AFTER DELETE ON farmers
+    BEGIN
+        DELETE FROM farmer_locations WHERE id = OLD.id;
+    END
+    """,
+    "INSERT INTO farmer_locations "
+    "SELECT id, latitude, latitude, longitude, longitude FROM farmers "
+    "WHERE latitude IS NOT NULL AND longitude IS NOT NULL",
+)
+SQLITE_DROP = (
+    "DROP TRIGGER IF EXISTS farmers_location_insert",
+    "DROP TRIGGER IF EXISTS farmers_location_update",
+    "DROP TRIGGER IF EXISTS farmers_location_delete",
+    "DROP TABLE IF EXISTS farmer_locations",
+)
+
+
+def upgrade() -> None:
+    op.add_column("farmers", sa.Column("geohash", sa.String(12), nullable=True))
+
+    # Backfill the geohashes (NaN coordinates have none)
+    bind = op.get_bind()
+    farmers = sa.table(
+        "farmers",
+        sa.column("id"),
+        sa.column("latitude"),
+        sa.column("longitude"),
+        sa.column("geohash"),
+    )
+    set_geohash = (
+        farmers.update()
+        .where(farmers.c.id == sa.bindparam("farmer_id"))
+        .values(geohash=sa.bindparam("hash"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(farmers.c.id, farmers.c.latitude, farmers.c.longitude)
+            .where(
+                farmers.c.id > last_id,
+                farmers.c.latitude.is_not(None),
+                farmers.c.longitude.is_not(None),
+            )
+            .order_by(farmers.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            set_geohash,
+            [
+                {
+                    "farmer_id": i,
+                    "hash": (
+                        geohash(lat, lon)
+                        if math.isfinite(lat) and math.isfinite(lon)
+                        else None
+                    ),
+                }
+                for i, lat, lon in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    op.create_index("ix_farmers_geohash", "farmers", ["geohash"])
+
+    if bind.dialect.name == "sqlite":
+        for statement in SQLITE_CREATE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_DROP:
+            op.execute(statement)
+    op.drop_index("ix_farmers_geohash", table_name="farmers")
+    with op.batch_alter_table("farmers") as batch_op:
+        batch_op.drop_column("geohash")
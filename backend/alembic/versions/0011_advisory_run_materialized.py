@@ -0,0 +1,31 @@
+"""Advisory run cell and materialization day
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # existing runs count as on-demand: served only within the regular window
+    op.add_column("advisory_runs", sa.Column("cell", sa.String(32), nullable=True))
+    op.add_column(
+        "advisory_runs", sa.Column("materialized_on", sa.Date(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("advisory_runs") as batch_op:
+        batch_op.drop_column("materialized_on")
+        batch_op.drop_column("cell")
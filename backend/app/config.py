@@ -15,6 +15,95 @@ class Settings(BaseSettings):
     WHATSAPP_PHONE_NUMBER_ID: Optional[str] = None
     IPINFO_TOKEN: Optional[str] = None
 
+    # SQLite database files (ignored for other databases): journal mode,
+    # fsync level, page cache per connection (KiB), memory-mapped I/O
+    # (bytes) and how long to wait on another process's lock. Each process
+    # writes through one connection; a write waits up to
+    # SQLITE_WRITER_TIMEOUT_SECONDS for it.
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KIB: int = 16384
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_WRITER_TIMEOUT_SECONDS: float = 30.0
+
+    # Forecast cache: farmers are bucketed into WEATHER_GRID_DEG cells and each
+    # cell is fetched at most once per TTL (Open-Meteo refreshes hourly)
+    WEATHER_GRID_DEG: float = 0.05
+    WEATHER_CACHE_TTL_SECONDS: int = 3600
+    WEATHER_CACHE_MAX_ENTRIES: int = 4096
+
+    # Batch advisory runs: concurrent cell fetches and rows per bulk INSERT
+    ADVISORY_BATCH_FETCH_CONCURRENCY: int = 8
+    ADVISORY_BATCH_CHUNK: int = 1000
+    # /advisories/for/{id} returns the rows generated within this window
+    # instead of regenerating; 0 always regenerates
+    ADVISORY_REGENERATE_WINDOW_SECONDS: int = 900
+
+    # Scheduled advisory runs: one cron job per entry ({"name", "time" HH:MM,
+    # optional "bbox" [min_lat, min_lon, max_lat, max_lon]) in the timezone
+    # below. Rules run in a process pool (0 = one worker per core); a DB
+    # lease makes sure one uvicorn worker executes each run.
+    ADVISORY_SCHEDULER_ENABLED: bool = True
+    ADVISORY_JOBS: list[dict] = [{"name": "kerala", "time": "05:30"}]
+    ADVISORY_JOB_TIMEZONE: str = "Asia/Kolkata"
+    ADVISORY_JOB_WORKERS: int = 0
+    ADVISORY_JOB_LEASE_SECONDS: int = 3600
+    # with the scheduler on, /advisories/for/{id} serves a job's run from
+    # today for the farmer's cell, at most this old, without a forecast fetch
+    ADVISORY_MATERIALIZED_MAX_AGE_SECONDS: int = 24 * 3600
+
+    # POST /activities/bulk: rows per INSERT transaction and per-row errors
+    # returned before the rest are only counted
+    ACTIVITY_BULK_CHUNK: int = 5000
+    ACTIVITY_BULK_MAX_ERRORS: int = 1000
+    # POST /farmers/import and manage_db.py import: the same for farmers
+    FARMER_IMPORT_CHUNK: int = 5000
+    FARMER_IMPORT_MAX_ERRORS: int = 1000
+
+    # GET /export/{table} and manage_db.py export: rows per server-side
+    # cursor fetch, which bounds export memory
+    EXPORT_YIELD_PER: int = 10000
+
+    # GET /farmers/near: largest search radius
+    FARMER_NEAR_MAX_RADIUS_KM: float = 200.0
+
+    # Cursor-paginated list endpoints: default and maximum page size
+    API_PAGE_SIZE_DEFAULT: int = 50
+    API_PAGE_SIZE_MAX: int = 200
+
+    # Pooled outbound HTTP clients (per upstream)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Ollama (local LLM) used by the /ai routes
+    OLLAMA_API_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = "llama3"
+    OLLAMA_TIMEOUT_SECONDS: float = 60.0
+    OLLAMA_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OLLAMA_MAX_CONNECTIONS: int = 4
+
+    # LLM scheduler: concurrent generations and per-lane queue depth before 429
+    LLM_MAX_CONCURRENCY: int = 1
+    LLM_QUEUE_LIMIT_INTERACTIVE: int = 16
+    LLM_QUEUE_LIMIT_BATCH: int = 32
+
+    # Persisted AI advisory cache keyed on hash(model, prompt, options)
+    AI_CACHE_TTL_SECONDS: int = 6 * 3600
+    AI_CACHE_MAX_ENTRIES: int = 10000
+    # stores between sweeps of expired and overflowing rows, per worker
+    AI_CACHE_EVICT_EVERY: int = 100
+
+    # Semantic /ai/chat cache: reuse an answer when a question from the same
+    # profile bucket has cosine similarity >= threshold with a cached one
+    AI_SEMANTIC_CACHE_ENABLED: bool = True
+    AI_SEMANTIC_CACHE_THRESHOLD: float = 0.85
+    AI_SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 3600
+    AI_SEMANTIC_CACHE_MAX_PER_BUCKET: int = 256
+    # buckets kept per worker, least recently used dropped first
+    AI_SEMANTIC_CACHE_MAX_BUCKETS: int = 256
+
     # Pydantic v2 style config
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,9 +1,188 @@
-﻿from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+﻿import time
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 from .config import settings
 
+# asyncio DBAPI used for each backend named in DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL (sqlite://, postgresql+psycopg2://) to its async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    async_url = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return async_url.render_as_string(hide_password=False)
+
+
+def is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    return parsed.database not in (None, "", ":memory:")
+
+
+class WriterLaneStats:
+    """
+    How long writes waited: for this process's writer connection (the lane)
+    and, once holding it, for SQLite's write lock held by another process.
+    """
+
+    def __init__(self):
+        self.transactions = 0
+        self.lane_wait_ms = 0.0
+        self.max_lane_wait_ms = 0.0
+        self.lock_wait_ms = 0.0
+        self.max_lock_wait_ms = 0.0
+        self.busy_errors = 0  # "database is locked" after busy_timeout
+
+    def lane_wait(self, ms: float) -> None:
+        self.lane_wait_ms += ms
+        self.max_lane_wait_ms = max(self.max_lane_wait_ms, ms)
+
+    def lock_wait(self, ms: float) -> None:
+        self.transactions += 1
+        self.lock_wait_ms += ms
+        self.max_lock_wait_ms = max(self.max_lock_wait_ms, ms)
+
+    def stats(self) -> Dict[str, Any]:
+        n = self.transactions
+        return {
+            "sqlite_writer_lane": SQLITE_LANE,
+            "journal_mode": settings.SQLITE_JOURNAL_MODE if SQLITE_LANE else None,
+            "write_transactions": n,
+            "lane_wait_ms_avg": round(self.lane_wait_ms / n, 3) if n else 0.0,
+            "lane_wait_ms_max": round(self.max_lane_wait_ms, 3),
+            "lock_wait_ms_avg": round(self.lock_wait_ms / n, 3) if n else 0.0,
+            "lock_wait_ms_max": round(self.max_lock_wait_ms, 3),
+            "busy_errors": self.busy_errors,
+        }
+
+
+writer_lane = WriterLaneStats()
+
+
+def _timed_pool(pool_class):
+    class WriterPool(pool_class):
+        # time spent queueing for the single writer connection
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                writer_lane.lane_wait((time.perf_counter() - started) * 1000)
+
+    return WriterPool
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        f"journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+        f"synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"cache_size = -{settings.SQLITE_CACHE_SIZE_KIB}",
+        f"mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        f"busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def _count_busy(context):
+    if "database is locked" in str(context.original_exception):
+        writer_lane.busy_errors += 1
+
+
+def _driver_autocommit(dbapi_connection, connection_record):
+    # let SQLAlchemy emit BEGIN itself (see _begin_immediate)
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(conn):
+    # take the write lock up front: waiting here is covered by busy_timeout,
+    # whereas upgrading a read transaction mid-way fails at once with
+    # "database is locked" if another process wrote in the meantime
+    started = time.perf_counter()
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    writer_lane.lock_wait((time.perf_counter() - started) * 1000)
+
+
+class LaneSession(Session):
+    """
+    Session that runs reads on its bind and writes on `info["writer"]` when
+    one is configured: flushes, INSERT/UPDATE/DELETE statements and
+    `connection()`, which callers only use for bulk writes. Reads are
+    therefore never queued behind writes, and a request holds the writer
+    only from its first write to its commit, not while it fetches a
+    forecast. Autoflush is off throughout, so nothing reads back its own
+    uncommitted writes through the reader.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        writer = self.info.get("writer")
+        if writer is not None and (
+            self._flushing or clause is None or isinstance(clause, UpdateBase)
+        ):
+            return writer
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+# SQLite allows one writer at a time. On a database file, each process
+# writes through a single connection that begins IMMEDIATE transactions, so
+# writers queue in the pool instead of failing with "database is locked",
+# while WAL lets the reader pool keep reading alongside them.
+SQLITE_LANE = is_sqlite_file(settings.DATABASE_URL)
+ASYNC_DATABASE_URL = async_database_url(settings.DATABASE_URL)
+
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Async engine for `async def` routes, so DB I/O never blocks the event loop.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+write_engine, async_write_engine = engine, async_engine
+
+if SQLITE_LANE:
+    writer_pool = {
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.SQLITE_WRITER_TIMEOUT_SECONDS,
+    }
+    write_engine = create_engine(
+        settings.DATABASE_URL, poolclass=_timed_pool(QueuePool), **writer_pool
+    )
+    async_write_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=_timed_pool(AsyncAdaptedQueuePool), **writer_pool
+    )
+    for sync_engine in (engine, async_engine.sync_engine):
+        event.listen(sync_engine, "connect", _sqlite_pragmas)
+        event.listen(sync_engine, "handle_error", _count_busy)
+    for sync_engine in (write_engine, async_write_engine.sync_engine):
+        event.listen(sync_engine, "connect", _sqlite_pragmas)
+        event.listen(sync_engine, "connect", _driver_autocommit)
+        event.listen(sync_engine, "begin", _begin_immediate)
+        event.listen(sync_engine, "handle_error", _count_busy)
+
+SessionLocal = sessionmaker(
+    bind=engine,
+    class_=LaneSession,
+    info={"writer": write_engine} if SQLITE_LANE else {},
+    autoflush=False,
+    autocommit=False,
+)
+# expire_on_commit=False: async sessions cannot lazy-load expired attributes.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=LaneSession,
+    info={"writer": async_write_engine.sync_engine} if SQLITE_LANE else {},
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 
 def get_db():
@@ -12,3 +191,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,15 +1,47 @@
-﻿from fastapi import FastAPI
+﻿from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .db import engine
+from .db import engine, writer_lane
 from .models import Base
-from .routers import farmers, activities, advisories, webhook_whatsapp, geolocation, ai
+from .pagination import CURSOR_HEADER
+from .routers import (
+    farmers,
+    activities,
+    advisories,
+    exports,
+    webhook_whatsapp,
+    geolocation,
+    ai,
+)
+from .services.advisory_scheduler import advisory_scheduler
+from .services.ai_cache import response_cache_stats
+from .services.http_clients import http_clients
+from .services.llm_scheduler import llm_scheduler
+from .services.semantic_cache import semantic_cache
+from .services.weather import forecast_cache, forecast_flight
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared outbound HTTP pools live for the whole worker
+    http_clients.open()
+    if settings.ADVISORY_SCHEDULER_ENABLED:
+        advisory_scheduler.start()
+    try:
+        yield
+    finally:
+        advisory_scheduler.shutdown()
+        await http_clients.aclose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Krishi Sakhi API",
     description="Personal Farming Assistant API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS - use the new cors_origins_list property
@@ -19,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER],
 )
 
 # Create tables (simple approach - use manage_db.py for reset)
@@ -28,6 +61,7 @@ app.add_middleware(
 app.include_router(farmers.router)
 app.include_router(activities.router)
 app.include_router(advisories.router)
+app.include_router(exports.router)
 app.include_router(webhook_whatsapp.router)
 app.include_router(geolocation.router)
 app.include_router(ai.router)
@@ -55,6 +89,20 @@ def version():
     return {"version": app.version}
 
 
+@app.get("/metrics")
+def metrics():
+    """In-process cache and upstream counters for this worker"""
+    return {
+        "weather_cache": forecast_cache.stats(),
+        "weather_singleflight": forecast_flight.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "ai_response_cache": response_cache_stats.as_dict(),
+        "ai_semantic_cache": semantic_cache.stats(),
+        "advisory_scheduler": advisory_scheduler.stats(),
+        "database": writer_lane.stats(),
+    }
+
+
 @app.get("/db-status")
 def database_status():
     """Check database connection and table status"""
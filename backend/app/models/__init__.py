@@ -1,4 +1,9 @@
 ﻿from .base import Base
 from .farmer import Farmer
+from .farmer_crop import FarmerCrop
+from .farmer_location import farmer_locations
 from .activity import Activity
 from .advisory import Advisory
+from .advisory_run import AdvisoryRun
+from .ai_cache import AIResponseCache
+from .scheduled_job import ScheduledJob
@@ -1,6 +1,7 @@
-﻿from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float
+﻿from sqlalchemy import Column, Integer, Index, String, ForeignKey, DateTime, Float
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from .advisory import utcnow
 from .base import Base
 
 
@@ -8,15 +9,21 @@ class Activity(Base):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True)
-    farmer_id = Column(
-        Integer, ForeignKey("farmers.id", ondelete="CASCADE"), index=True
-    )
+    # indexed by ix_activities_farmer_at below
+    farmer_id = Column(Integer, ForeignKey("farmers.id", ondelete="CASCADE"))
     type = Column(
         String(50), nullable=False
     )  # sowing, irrigation, spray, pest, harvest
     notes = Column(String(500), nullable=True)
     quantity = Column(Float, nullable=True)
     unit = Column(String(20), nullable=True)
-    at = Column(DateTime(timezone=True), server_default=func.now())
+    # set client-side too, so keyset cursors on (at, id) compare consistently
+    at = Column(DateTime(timezone=True), server_default=func.now(), default=utcnow)
 
     farmer = relationship("Farmer")
+
+    __table_args__ = (
+        # per-farmer log, newest first, optionally bounded in time
+        # (GET /activities/by-farmer/{id})
+        Index("ix_activities_farmer_at", "farmer_id", "at", "id"),
+    )
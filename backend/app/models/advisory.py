@@ -1,9 +1,30 @@
-﻿from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+﻿import hashlib
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Column, Date, Integer, Index, String, ForeignKey, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .base import Base
 
 
+def content_hash(text: str) -> str:
+    """sha256 of the whitespace-normalized advisory text."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def advisory_day() -> date:
+    # dedup day boundary, in UTC like created_at
+    return datetime.now(timezone.utc).date()
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _default_content_hash(context) -> str:
+    return content_hash(context.get_current_parameters()["text"])
+
+
 class Advisory(Base):
     __tablename__ = "advisories"
 
@@ -14,6 +35,27 @@ class Advisory(Base):
     text = Column(String(1000), nullable=False)
     severity = Column(String(20), default="info")  # info/warn/urgent
     source = Column(String(20), default="rule")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # set client-side too, so every row carries sub-second precision and
+    # keyset cursors on (created_at, id) compare consistently
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), default=utcnow
+    )
+    # dedup key: the same text at the same severity is stored once per farmer
+    # per day; both default from the row, so bulk INSERTs get them too
+    content_hash = Column(String(64), nullable=False, default=_default_content_hash)
+    day = Column(Date, nullable=False, default=advisory_day)
 
     farmer = relationship("Farmer")
+
+    __table_args__ = (
+        # per-farmer feed, newest first (GET /advisories/by-farmer/{id})
+        Index("ix_advisories_farmer_created", "farmer_id", "created_at", "id"),
+        Index(
+            "uq_advisories_dedup",
+            "farmer_id",
+            "content_hash",
+            "severity",
+            "day",
+            unique=True,
+        ),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import JSON, Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class AdvisoryRun(Base):
+    """
+    Inputs and output of the last advisory computation for a farmer. While
+    both fingerprints still match, the stored advisories are current and
+    the rules are not re-evaluated.
+    """
+
+    __tablename__ = "advisory_runs"
+
+    farmer_id = Column(
+        Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True
+    )
+    # rule-relevant slice of the farmer's cell forecast (dates included)
+    forecast_fingerprint = Column(String(64), nullable=False)
+    # rule set version + the farmer fields the rules read
+    profile_fingerprint = Column(String(64), nullable=False)
+    # the advisories produced: their dedup day and [content_hash, severity]s
+    day = Column(Date, nullable=False)
+    advisories = Column(JSON, nullable=False)
+    # forecast grid cell ("lat,lon" indexes) the run was computed for, and
+    # the UTC day a scheduled job last computed or confirmed it; only such
+    # runs are served without looking at the forecast
+    cell = Column(String(32), nullable=True)
+    materialized_on = Column(Date, nullable=True)
+    computed_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class AIResponseCache(Base):
+    __tablename__ = "ai_response_cache"
+
+    # sha256 of (model, normalized prompt, generation options)
+    key = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
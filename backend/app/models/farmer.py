@@ -1,6 +1,10 @@
-﻿from sqlalchemy import Column, Integer, String, Float, DateTime
+﻿from sqlalchemy import Column, Integer, Index, String, Float, DateTime
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship, validates
 from .base import Base
+from .farmer_crop import FarmerCrop
+from ..services.crops import crop_registry
+from ..services import geo
 
 
 class Farmer(Base):
@@ -16,4 +20,43 @@ class Farmer(Base):
     soil_type = Column(String(50), nullable=True)
     irrigation_type = Column(String(50), nullable=True)
     crops = Column(String(200), nullable=True)  # comma-separated
+    # geohash of latitude/longitude, kept in step on every ORM write (bulk
+    # writes set it themselves); non-SQLite backends search areas by prefix
+    geohash = Column(String(12), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # `crops` normalized to one row per crop key, rebuilt whenever `crops`
+    # is assigned through the ORM (bulk writes use replace_farmer_crops)
+    crop_rows = relationship(
+        FarmerCrop, cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    # GET /farmers/ filters, each ending in id so a filtered page is read in
+    # keyset order straight off the index
+    __table_args__ = (
+        Index("ix_farmers_language_id", "language", "id"),
+        Index("ix_farmers_soil_type_id", "soil_type", "id"),
+        Index("ix_farmers_irrigation_type_id", "irrigation_type", "id"),
+    )
+
+    @validates("crops")
+    def _sync_crop_rows(self, key, crops):
+        # keep rows for crops still grown, with their area and season
+        existing = {row.crop_key: row for row in self.crop_rows}
+        self.crop_rows = [
+            existing.get(k) or FarmerCrop(crop_key=k)
+            for k in crop_registry.parse(crops)
+        ]
+        return crops
+
+    @validates("latitude", "longitude")
+    def _sync_geohash(self, key, value):
+        lat = value if key == "latitude" else self.latitude
+        lon = value if key == "longitude" else self.longitude
+        self.geohash = geo.geohash(lat, lon)
+        return value
+
+    @property
+    def crop_keys(self):
+        """Canonical crop keys for `crops`, parsed once per distinct string."""
+        return crop_registry.parse(self.crops)
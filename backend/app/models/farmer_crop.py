@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String
+from .base import Base
+
+
+class FarmerCrop(Base):
+    """
+    One crop a farmer grows, by canonical crop key (see CropRegistry). Kept
+    in step with Farmer.crops, the free-text list farmers enter, so farmers
+    are selected by crop through an index rather than a LIKE scan.
+    """
+
+    __tablename__ = "farmer_crops"
+
+    farmer_id = Column(
+        Integer, ForeignKey("farmers.id", ondelete="CASCADE"), primary_key=True
+    )
+    crop_key = Column(String(200), primary_key=True)
+    # per-crop detail, not captured from the crops string
+    area_ha = Column(Float, nullable=True)
+    season = Column(String(20), nullable=True)  # e.g. virippu/mundakan/puncha
+
+    __table_args__ = (
+        # farmers growing a crop, in farmer id (keyset) order
+        Index("ix_farmer_crops_crop_farmer", "crop_key", "farmer_id"),
+    )
@@ -0,0 +1,59 @@
+from sqlalchemy import DDL, Float, Integer, column, event, table
+from .farmer import Farmer
+
+
+# SQLite R*Tree of farmer coordinates, each a zero-size box keyed by farmer
+# id. Triggers on farmers keep it in step, so ORM and bulk writes alike are
+# indexed. A virtual table is outside Base.metadata (create_all cannot make
+# one); it is created and dropped along with farmers on SQLite instead.
+farmer_locations = table(
+    "farmer_locations",
+    column("id", Integer),
+    column("min_lat", Float),
+    column("max_lat", Float),
+    column("min_lon", Float),
+    column("max_lon", Float),
+)
+
+CREATE_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS farmer_locations "
+    "USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """
+    CREATE TRIGGER IF NOT EXISTS farmers_location_insert
+    AFTER INSERT ON farmers
+    WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+    BEGIN
+        INSERT INTO farmer_locations
+        VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS farmers_location_update
+    AFTER UPDATE OF latitude, longitude ON farmers
+    WHEN NEW.latitude IS NOT OLD.latitude OR NEW.longitude IS NOT OLD.longitude
+    BEGIN
+        DELETE FROM farmer_locations WHERE id = OLD.id;
+        INSERT INTO farmer_locations
+        SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+        WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS farmers_location_delete
+    AFTER DELETE ON farmers
+    BEGIN
+        DELETE FROM farmer_locations WHERE id = OLD.id;
+    END
+    """,
+)
+
+for statement in CREATE_STATEMENTS:
+    event.listen(
+        Farmer.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+# the triggers go with the farmers table itself
+event.listen(
+    Farmer.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS farmer_locations").execute_if(dialect="sqlite"),
+)
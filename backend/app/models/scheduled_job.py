@@ -0,0 +1,25 @@
+from sqlalchemy import JSON, Column, DateTime, Float, Integer, String, Text
+from .base import Base
+
+
+class ScheduledJob(Base):
+    """
+    Lease and last outcome of a scheduled job, shared by all workers. A
+    worker runs the job only if it takes the lease (`locked_until` in the
+    past); the lease is held until it expires, so the other workers firing
+    for the same slot skip it.
+    """
+
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(100), nullable=True)  # host:pid holding the lease
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    status = Column(String(20), nullable=True)  # running/succeeded/failed
+    duration_ms = Column(Float, nullable=True)
+    runs = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    last_result = Column(JSON, nullable=True)
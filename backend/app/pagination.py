@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Sequence
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import literal, tuple_
+from sqlalchemy.sql import ColumnElement
+
+from .config import settings
+
+
+# List endpoints keep returning a plain JSON array (the web UI relies on
+# it) and put the cursor for the next page in this header.
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_size_query():
+    return Query(
+        default=settings.API_PAGE_SIZE_DEFAULT, ge=1, le=settings.API_PAGE_SIZE_MAX
+    )
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for a row's sort key; datetimes travel as ISO strings."""
+    blob = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(blob.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    """
+    Sort key from a cursor made by encode_cursor, each value passed through
+    its parser (e.g. `datetime.fromisoformat`, `int`). Malformed or foreign
+    cursors are a 400, never a 500.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong arity")
+        return [parse(v) for parse, v in zip(parsers, values)]
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def before(columns: Sequence[ColumnElement], values: Sequence[Any]) -> ColumnElement:
+    """Rows after the cursor in a (columns...) DESC ordering: a row-value `<`."""
+    if len(columns) == 1:
+        return columns[0] < values[0]
+    binds = [literal(v, c.type) for c, v in zip(columns, values)]
+    return tuple_(*columns) < tuple_(*binds)
+
+
+def paginate(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+    response: Response,
+) -> Sequence[Any]:
+    """
+    Trim a `limit + 1` row fetch to one page and, if there is a further
+    page, set CURSOR_HEADER from the sort key of the page's last row.
+    """
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    response.headers[CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_db, get_db
 from ..models.activity import Activity
 from ..models.farmer import Farmer
-from ..schemas.activity import ActivityCreate, ActivityOut
+from ..pagination import before, decode_cursor, page_size_query, paginate
+from ..schemas.activity import (
+    ActivityBulkResult,
+    ActivityCreate,
+    ActivityOut,
+    as_utc,
+)
+from ..services.activity_ingest import ingest_activities
 
 
 router = APIRouter(prefix="/activities", tags=["activities"])
@@ -14,19 +26,60 @@ def create_activity(payload: ActivityCreate, db: Session = Depends(get_db)):
     farmer = db.get(Farmer, payload.farmer_id)
     if not farmer:
         raise HTTPException(404, "Farmer not found")
-    # Pydantic v2: use model_dump for dict conversion
-    act = Activity(**payload.model_dump())
+    # Pydantic v2: use model_dump for dict conversion; a missing `at`
+    # falls back to the column default
+    act = Activity(**payload.model_dump(exclude_none=True))
     db.add(act)
     db.commit()
     db.refresh(act)
     return act
 
 
+@router.post("/bulk", response_model=ActivityBulkResult)
+async def bulk_create_activities(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sync many activities in one request: an NDJSON body (one ActivityCreate
+    object per line, `Content-Type: application/x-ndjson`), read and stored
+    as it streams in. Rows are inserted in ACTIVITY_BULK_CHUNK transactions;
+    invalid lines and unknown farmers are reported per line and do not stop
+    the rest.
+    """
+    return await ingest_activities(db, request.stream())
+
+
 @router.get("/by-farmer/{farmer_id}", response_model=list[ActivityOut])
-def list_by_farmer(farmer_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(Activity)
-        .filter(Activity.farmer_id == farmer_id)
-        .order_by(Activity.id.desc())
-        .all()
-    )
+def list_by_farmer(
+    farmer_id: int,
+    response: Response,
+    since: Optional[datetime] = Query(default=None, alias="from"),
+    until: Optional[datetime] = Query(default=None, alias="to"),
+    type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = page_size_query(),
+    db: Session = Depends(get_db),
+):
+    """
+    A farmer's activities, newest first. `from` (inclusive) and `to`
+    (exclusive) bound `at`; `type` takes comma-separated values. Pages are
+    keyset-paginated on (at, id): pass the X-Next-Cursor response header
+    back as `cursor` for the next page; no header means this is the last
+    page.
+    """
+    since, until = as_utc(since), as_utc(until)
+    if since and until and since >= until:
+        raise HTTPException(400, "`from` must be before `to`")
+    stmt = select(Activity).where(Activity.farmer_id == farmer_id)
+    if since:
+        stmt = stmt.where(Activity.at >= since)
+    if until:
+        stmt = stmt.where(Activity.at < until)
+    if type:
+        stmt = stmt.where(Activity.type.in_(type.split(",")))
+    if cursor:
+        key = decode_cursor(cursor, (datetime.fromisoformat, int))
+        stmt = stmt.where(before([Activity.at, Activity.id], key))
+    stmt = stmt.order_by(Activity.at.desc(), Activity.id.desc())
+    rows = list(db.scalars(stmt.limit(limit + 1)))
+    return paginate(rows, limit, lambda a: (a.at, a.id), response)
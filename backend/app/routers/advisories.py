@@ -1,11 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..db import get_db
-from ..models.farmer import Farmer
+from datetime import datetime
+from typing import Optional
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..db import get_async_db
 from ..models.advisory import Advisory
-from ..schemas.advisory import AdvisoryOut
-from ..services.weather import get_forecast
+from ..models.farmer import Farmer
+from ..pagination import before, decode_cursor, page_size_query, paginate
+from ..schemas.advisory import (
+    AdvisoryBatchRequest,
+    AdvisoryBatchResult,
+    AdvisoryOut,
+    ScheduledJobOut,
+)
+from ..services.http_clients import get_http_client
+from ..services.weather import forecast_cache, get_forecast, grid_cell
+from ..services.advisory_batch import run_batch
+from ..services.advisory_scheduler import advisory_scheduler, job_statuses
 from ..services.advisory_engine import build_advisories
+from ..services.advisory_store import (
+    fresh_run_advisories,
+    materialized_run_advisories,
+    persist_advisories,
+    record_runs,
+    run_record,
+    unchanged_run_advisories,
+)
+from ..services.rule_engine import default_ruleset
 import math
 
 
@@ -13,10 +37,32 @@ router = APIRouter(prefix="/advisories", tags=["advisories"])
 
 
 @router.get("/for/{farmer_id}", response_model=list[AdvisoryOut])
-async def generate_for_farmer(farmer_id: int, db: Session = Depends(get_db)):
-    farmer = db.get(Farmer, farmer_id)
+async def generate_for_farmer(
+    farmer_id: int,
+    force_refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(get_http_client("open_meteo")),
+):
+    """
+    Rule advisories for a farmer. Within ADVISORY_REGENERATE_WINDOW_SECONDS
+    of the last run the stored rows are returned as-is, so polling is a
+    pure read; so is a run the morning job materialized today for the
+    farmer's cell and profile. Otherwise the rules are only re-run if the
+    forecast for the farmer's cell or their profile changed.
+    `force_refresh=true` always regenerates. Advisories already stored
+    today are not written twice.
+    """
+    farmer = await db.get(Farmer, farmer_id)
     if not farmer:
         raise HTTPException(404, "Farmer not found")
+
+    profile_fp = default_ruleset.profile_fingerprint(farmer.crop_keys)
+    window = settings.ADVISORY_REGENERATE_WINDOW_SECONDS
+    if window > 0 and not force_refresh:
+        stored = await fresh_run_advisories(db, farmer.id, profile_fp, window)
+        if stored is not None:
+            return stored
+
     if farmer.latitude is None or farmer.longitude is None:
         raise HTTPException(status_code=422, detail="Invalid farmer coordinates")
 
@@ -29,30 +75,110 @@ async def generate_for_farmer(farmer_id: int, db: Session = Depends(get_db)):
     except Exception:
         raise HTTPException(status_code=422, detail="Invalid farmer coordinates")
 
+    # today's scheduled run for the farmer's cell, unless this worker
+    # already holds a forecast for the cell that it was not computed from
+    if settings.ADVISORY_SCHEDULER_ENABLED and not force_refresh:
+        cell = grid_cell(lat, lon)
+        cached = forecast_cache.get(cell)
+        stored = await materialized_run_advisories(
+            db,
+            farmer.id,
+            profile_fp,
+            cell,
+            settings.ADVISORY_MATERIALIZED_MAX_AGE_SECONDS,
+            default_ruleset.forecast_fingerprint(cached) if cached else None,
+        )
+        if stored is not None:
+            return stored
+
     try:
-        weather = await get_forecast(lat, lon)
+        weather = await get_forecast(lat, lon, client)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Advisory temporarily unavailable: {type(e).__name__}",
         )
+
+    # skip the rules entirely when neither input changed since the last run
+    forecast_fp = default_ruleset.forecast_fingerprint(weather)
+    if not force_refresh:
+        stored = await unchanged_run_advisories(db, farmer.id, forecast_fp, profile_fp)
+        if stored is not None:
+            return stored
+
     advs = build_advisories(
         {
             "crops": farmer.crops or "",
         },
         weather,
     )
+    rows = [
+        {
+            "farmer_id": farmer.id,
+            "text": a["text"],
+            "severity": a["severity"],
+            "source": a["source"],
+        }
+        for a in advs
+    ]
+    run = run_record(farmer.id, forecast_fp, profile_fp, rows, grid_cell(lat, lon))
+    await record_runs(db, [run])
+    return await persist_advisories(db, rows)
 
-    out = []
-    for a in advs:
-        adv = Advisory(
-            farmer_id=farmer.id,
-            text=a["text"],
-            severity=a["severity"],
-            source=a["source"],
-        )
-        db.add(adv)
-        db.commit()
-        db.refresh(adv)
-        out.append(adv)
-    return out
+
+@router.get("/by-farmer/{farmer_id}", response_model=list[AdvisoryOut])
+async def list_for_farmer(
+    farmer_id: int,
+    response: Response,
+    severity: Optional[str] = None,
+    source: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = page_size_query(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    A farmer's stored advisories, newest first. `severity` and `source`
+    take comma-separated values. Pages are keyset-paginated on
+    (created_at, id): pass the X-Next-Cursor response header back as
+    `cursor` for the next page; no header means this is the last page.
+    """
+    stmt = select(Advisory).where(Advisory.farmer_id == farmer_id)
+    if severity:
+        stmt = stmt.where(Advisory.severity.in_(severity.split(",")))
+    if source:
+        stmt = stmt.where(Advisory.source.in_(source.split(",")))
+    if cursor:
+        key = decode_cursor(cursor, (datetime.fromisoformat, int))
+        stmt = stmt.where(before([Advisory.created_at, Advisory.id], key))
+    stmt = stmt.order_by(Advisory.created_at.desc(), Advisory.id.desc())
+    rows = list(await db.scalars(stmt.limit(limit + 1)))
+    return paginate(rows, limit, lambda a: (a.created_at, a.id), response)
+
+
+@router.post("/batch", response_model=AdvisoryBatchResult)
+async def generate_batch(
+    filters: AdvisoryBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(get_http_client("open_meteo")),
+):
+    """
+    Generate rule advisories for every farmer matching the filters, fetching
+    each forecast grid cell once. Same as `python manage_db.py advise-batch`.
+    """
+    return await run_batch(db, filters, client)
+
+
+@router.get("/jobs", response_model=list[ScheduledJobOut])
+async def scheduled_jobs(db: AsyncSession = Depends(get_async_db)):
+    """
+    Morning advisory jobs: last run, duration and failure counts as recorded
+    by whichever worker ran them, plus live progress if it is this worker.
+    """
+    jobs = []
+    for job in await job_statuses(db):
+        out = ScheduledJobOut.model_validate(job)
+        local = advisory_scheduler.jobs.get(job.name)
+        if local is not None and job.owner == advisory_scheduler.owner:
+            out.progress = local.as_dict()
+        jobs.append(out)
+    return jobs
@@ -4,61 +4,203 @@ Provides AI-powered farming advisories using Ollama LLM API
 
 Example curl requests to test endpoints:
 
-# Generate AI advisory for farmer
+# Generate AI advisory for farmer (cached per profile; bypass with force_refresh)
 curl -X POST http://localhost:8000/ai/advise/1
+curl -X POST "http://localhost:8000/ai/advise/1?force_refresh=true"
 
 # Chat with AI about farming
 curl -X POST http://localhost:8000/ai/chat \
   -H "Content-Type: application/json" \
   -d '{"question":"What to do after rain?", "farmer_id":1}'
+
+# Same, streamed token by token as Server-Sent Events
+curl -N -X POST http://localhost:8000/ai/chat/stream \
+  -H "Content-Type: application/json" \
+  -d '{"question":"What to do after rain?", "farmer_id":1}'
 """
 
-import requests
+import json
+import httpx
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional
-from ..db import get_db
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+from ..config import settings
+from ..db import get_async_db
 from ..models.farmer import Farmer
 from ..models.advisory import Advisory
 from ..schemas.advisory import AdvisoryOut
 from ..schemas.ai import ChatRequest, ChatResponse
+from ..services.ai_cache import cache_key, get_cached_response, store_response
+from ..services.advisory_store import persist_advisories
+from ..services.http_clients import get_http_client
+from ..services.llm_scheduler import BATCH, INTERACTIVE, QueueFull, llm_scheduler
+from ..services.semantic_cache import (
+    embed_question,
+    profile_bucket,
+    region_cell,
+    semantic_cache,
+)
+from ..services.weather import cell_center
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-# Ollama API configuration
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3"
+# Pooled client for settings.OLLAMA_API_URL (see services/http_clients.py)
+ollama_client = get_http_client("ollama")
 
 
-def call_ollama(prompt: str) -> str:
+async def acquire_llm_slot(lane: str) -> float:
     """
-    Call Ollama API to generate AI response
+    Wait for a generation slot in `lane`, or fail fast with 429 when its queue is full
     """
     try:
-        payload = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
+        return await llm_scheduler.acquire(lane)
+    except QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"AI advisor is busy ({e.lane} queue full). Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+class ReleasingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that awaits `release` once the response is finished,
+    even if its body never starts: a client that disconnects before the
+    first chunk makes Starlette fail on the response start, so the body
+    generator (and any `finally` in it) never runs.
+    """
+
+    def __init__(self, content, release: Callable[[], Awaitable[None]], **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.release()
+
 
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=30)
+@asynccontextmanager
+async def llm_slot(lane: str) -> AsyncIterator[None]:
+    started = await acquire_llm_slot(lane)
+    try:
+        yield
+    finally:
+        llm_scheduler.release(lane, started)
+
+
+async def call_ollama(
+    prompt: str, client: httpx.AsyncClient, lane: str = INTERACTIVE
+) -> str:
+    """
+    Call Ollama API to generate AI response, queued behind the LLM scheduler
+    """
+    async with llm_slot(lane):
+        return await _generate(prompt, client)
+
+
+async def _generate(prompt: str, client: httpx.AsyncClient) -> str:
+    try:
+        payload = {"model": settings.OLLAMA_MODEL, "prompt": prompt, "stream": False}
+
+        response = await client.post("/api/generate", json=payload)
         response.raise_for_status()
 
         result = response.json()
         return result.get("response", "Sorry, I couldn't generate a response.")
 
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         raise HTTPException(
             status_code=503,
-            detail="Ollama service is not running. Please start Ollama on http://localhost:11434",
+            detail=f"Ollama service is not running. Please start Ollama on {settings.OLLAMA_API_URL}",
         )
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(
             status_code=504,
             detail="Ollama service request timed out. The model may be busy or overloaded.",
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Ollama API error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+async def open_ollama_stream(prompt: str, client: httpx.AsyncClient) -> httpx.Response:
+    """
+    Start a streamed Ollama generation and return once response headers arrive,
+    so connection failures still surface as HTTP errors before any SSE is sent.
+    The caller owns the response and must close it.
+    """
+    payload = {"model": settings.OLLAMA_MODEL, "prompt": prompt, "stream": True}
+    request = client.build_request("POST", "/api/generate", json=payload)
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Ollama service is not running. Please start Ollama on {settings.OLLAMA_API_URL}",
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail="Ollama service request timed out. The model may be busy or overloaded.",
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Ollama API error: {str(e)}")
+
+    if response.is_error:
+        await response.aclose()
+        raise HTTPException(
+            status_code=500, detail=f"Ollama API error: HTTP {response.status_code}"
+        )
+    return response
+
+
+async def iter_ollama_tokens(response: httpx.Response) -> AsyncIterator[str]:
+    """
+    Yield tokens from Ollama's NDJSON stream until it reports done
+    """
+    async for line in response.aiter_lines():
+        if not line.strip():
+            continue
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"])
+        if chunk.get("response"):
+            yield chunk["response"]
+        if chunk.get("done"):
+            break
+
+
+async def lookup_similar_answer(
+    farmer: Farmer, question: str
+) -> Tuple[Optional[str], Optional[tuple]]:
+    """
+    Look for a cached answer to a near-duplicate question from the same
+    profile bucket. Returns (answer or None, key to store a fresh answer
+    under); embedding failures just skip the cache.
+    """
+    if not settings.AI_SEMANTIC_CACHE_ENABLED:
+        return None, None
+    try:
+        vector = await run_in_threadpool(embed_question, question)
+    except Exception:
+        semantic_cache.errors += 1
+        return None, None
+    bucket = profile_bucket(farmer)
+    return semantic_cache.lookup(bucket, vector), (bucket, vector)
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 def build_farmer_prompt(farmer: Farmer) -> str:
     """
     Build a context-rich prompt using farmer's profile data
@@ -91,13 +233,60 @@ def build_farmer_prompt(farmer: Farmer) -> str:
     return ", ".join(prompt_parts)
 
 
+def build_chat_prompt(farmer: Farmer, question: str) -> str:
+    """
+    Build the /ai/chat prompt for a farmer's question
+    """
+    # Build context-rich prompt
+    farmer_context = build_farmer_prompt(farmer)
+
+    return f"""You are Krishi Sakhi, a farming advisor. 
+
+Farmer {farmer.id} with profile ({farmer_context}) asked: {question}
+
+Please reply in simple farming language that this farmer can easily understand. Be practical and specific to their situation. Keep your response under 100 words and focus on actionable advice."""
+
+
+def build_shared_chat_prompt(farmer: Farmer, question: str) -> str:
+    """
+    Build the /ai/chat prompt for an answer the semantic cache may serve to
+    other farmers of the same profile bucket: only the bucket's fields, with
+    the region instead of the exact location and no name or id
+    """
+    cell = region_cell(farmer)
+    region = "around %.2f, %.2f" % cell_center(cell) if cell else "Not specified"
+    farmer_context = ", ".join(
+        [
+            f"Region: {region}",
+            f"Soil type: {farmer.soil_type or 'Not specified'}",
+            f"Irrigation: {farmer.irrigation_type or 'Not specified'}",
+            f"Crops: {', '.join(farmer.crop_keys) or 'Not specified'}",
+        ]
+    )
+
+    return f"""You are Krishi Sakhi, a farming advisor. 
+
+A farmer with profile ({farmer_context}) asked: {question}
+
+Please reply in simple farming language that a farmer can easily understand. Be practical and specific to this situation, without addressing the farmer by name. Keep your response under 100 words and focus on actionable advice."""
+
+
 @router.post("/advise/{farmer_id}", response_model=AdvisoryOut)
-async def generate_ai_advisory(farmer_id: int, db: Session = Depends(get_db)):
+async def generate_ai_advisory(
+    farmer_id: int,
+    force_refresh: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(ollama_client),
+):
     """
     Generate AI-powered farming advisory for a specific farmer
+
+    Responses are cached on a hash of (model, prompt), so an unchanged
+    profile returns the stored advisory instead of a new generation;
+    pass `force_refresh=true` to bypass the cache.
     """
     # Fetch farmer from database
-    farmer = db.get(Farmer, farmer_id)
+    farmer = await db.get(Farmer, farmer_id)
     if not farmer:
         raise HTTPException(status_code=404, detail="Farmer not found")
 
@@ -119,19 +308,40 @@ Focus on:
 Keep the total response under 150 words. Be concise and actionable."""
 
     try:
-        # Call Ollama API
-        ai_response = call_ollama(prompt)
-
-        # Save advisory to database
-        advisory = Advisory(
-            farmer_id=farmer.id, text=ai_response, severity="info", source="ai"
+        key = cache_key(settings.OLLAMA_MODEL, prompt)
+        ai_response = None if force_refresh else await get_cached_response(db, key)
+
+        if ai_response is not None:
+            existing = await db.scalar(
+                select(Advisory)
+                .where(
+                    Advisory.farmer_id == farmer.id,
+                    Advisory.source == "ai",
+                    Advisory.text == ai_response,
+                )
+                .order_by(Advisory.id.desc())
+                .limit(1)
+            )
+            if existing is not None:
+                return existing
+        else:
+            # Call Ollama API
+            ai_response = await call_ollama(prompt, client, lane=BATCH)
+            await store_response(db, key, settings.OLLAMA_MODEL, ai_response)
+
+        # Save advisory to database (returns today's row if already stored)
+        advisories = await persist_advisories(
+            db,
+            [
+                {
+                    "farmer_id": farmer.id,
+                    "text": ai_response,
+                    "severity": "info",
+                    "source": "ai",
+                }
+            ],
         )
-
-        db.add(advisory)
-        db.commit()
-        db.refresh(advisory)
-
-        return advisory
+        return advisories[0]
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -143,27 +353,34 @@ Keep the total response under 150 words. Be concise and actionable."""
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_ai(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(ollama_client),
+):
     """
     Chat with AI about farming questions
     """
     # Fetch farmer from database
-    farmer = db.get(Farmer, request.farmer_id)
+    farmer = await db.get(Farmer, request.farmer_id)
     if not farmer:
         raise HTTPException(status_code=404, detail="Farmer not found")
 
-    # Build context-rich prompt
-    farmer_context = build_farmer_prompt(farmer)
-
-    prompt = f"""You are Krishi Sakhi, a farming advisor. 
-
-Farmer {request.farmer_id} with profile ({farmer_context}) asked: {request.question}
+    try:
+        cached, cache_slot = await lookup_similar_answer(farmer, request.question)
+        if cached is not None:
+            return ChatResponse(answer=cached, farmer_id=request.farmer_id)
 
-Please reply in simple farming language that this farmer can easily understand. Be practical and specific to their situation. Keep your response under 100 words and focus on actionable advice."""
+        # an answer that may be shared is generated without the farmer's identity
+        if cache_slot is not None:
+            prompt = build_shared_chat_prompt(farmer, request.question)
+        else:
+            prompt = build_chat_prompt(farmer, request.question)
 
-    try:
         # Call Ollama API
-        ai_answer = call_ollama(prompt)
+        ai_answer = await call_ollama(prompt, client)
+        if cache_slot is not None:
+            semantic_cache.store(*cache_slot, ai_answer)
 
         return ChatResponse(answer=ai_answer, farmer_id=request.farmer_id)
 
@@ -176,32 +393,108 @@ Please reply in simple farming language that this farmer can easily understand.
         )
 
 
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    client: httpx.AsyncClient = Depends(ollama_client),
+):
+    """
+    Chat with AI, streaming the answer as Server-Sent Events.
+
+    Each token arrives as `data: {"token": ...}`; the stream ends with an
+    `event: done` carrying the same body as /ai/chat (ChatResponse), or an
+    `event: error` if generation fails midway.
+    """
+    farmer = await db.get(Farmer, request.farmer_id)
+    if not farmer:
+        raise HTTPException(status_code=404, detail="Farmer not found")
+
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    cached, cache_slot = await lookup_similar_answer(farmer, request.question)
+    if cached is not None:
+
+        async def cached_events() -> AsyncIterator[str]:
+            yield sse_event({"token": cached})
+            answer = ChatResponse(answer=cached, farmer_id=request.farmer_id)
+            yield sse_event(answer.model_dump(), event="done")
+
+        return StreamingResponse(
+            cached_events(), media_type="text/event-stream", headers=sse_headers
+        )
+
+    if cache_slot is not None:
+        prompt = build_shared_chat_prompt(farmer, request.question)
+    else:
+        prompt = build_chat_prompt(farmer, request.question)
+    started = await acquire_llm_slot(INTERACTIVE)
+    try:
+        upstream = await open_ollama_stream(prompt, client)
+    except BaseException:
+        llm_scheduler.release(INTERACTIVE, started)
+        raise
+    released = False
+
+    async def release() -> None:
+        # Runs from the stream's end and from the response, whichever is first
+        nonlocal released
+        if not released:
+            released = True
+            await upstream.aclose()
+            llm_scheduler.release(INTERACTIVE, started)
+
+    async def events() -> AsyncIterator[str]:
+        tokens = []
+        try:
+            async for token in iter_ollama_tokens(upstream):
+                tokens.append(token)
+                yield sse_event({"token": token})
+            answer = ChatResponse(answer="".join(tokens), farmer_id=request.farmer_id)
+            if cache_slot is not None:
+                semantic_cache.store(*cache_slot, answer.answer)
+            yield sse_event(answer.model_dump(), event="done")
+        except Exception as e:
+            yield sse_event({"detail": f"Failed to get AI response: {str(e)}"}, "error")
+        finally:
+            # Also runs when the farmer disconnects, stopping the generation
+            await release()
+
+    return ReleasingStreamingResponse(
+        events(), release, media_type="text/event-stream", headers=sse_headers
+    )
+
+
 @router.get("/health")
-async def ai_health_check():
+async def ai_health_check(client: httpx.AsyncClient = Depends(ollama_client)):
     """
     Check if Ollama API is accessible
     """
     try:
         # Simple test call to Ollama
-        test_payload = {"model": OLLAMA_MODEL, "prompt": "Hello", "stream": False}
+        test_payload = {
+            "model": settings.OLLAMA_MODEL,
+            "prompt": "Hello",
+            "stream": False,
+        }
 
-        response = requests.post(OLLAMA_API_URL, json=test_payload, timeout=10)
+        response = await client.post("/api/generate", json=test_payload, timeout=10)
         response.raise_for_status()
 
         return {
             "status": "healthy",
             "service": "AI Advisory Service",
             "ollama_status": "connected",
-            "model": OLLAMA_MODEL,
+            "model": settings.OLLAMA_MODEL,
         }
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {
             "status": "unhealthy",
             "service": "AI Advisory Service",
             "ollama_status": "disconnected",
             "error": str(e),
-            "suggestion": "Ensure Ollama is running on http://localhost:11434",
+            "suggestion": f"Ensure Ollama is running on {settings.OLLAMA_API_URL}",
         }
     except Exception as e:
         return {"status": "error", "service": "AI Advisory Service", "error": str(e)}
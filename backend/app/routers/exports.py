@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Path, Query
+from fastapi.responses import StreamingResponse
+
+from ..services.export import EXPORT_TABLES, MEDIA_TYPES, export_table
+
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+@router.get("/{table}")
+def export(
+    table: str = Path(pattern=f"^({'|'.join(EXPORT_TABLES)})$"),
+    format: str = Query(default="ndjson", pattern=f"^({'|'.join(MEDIA_TYPES)})$"),
+    gzip: bool = False,
+):
+    """
+    Download a whole table (farmers, farmer_crops, activities or advisories)
+    as NDJSON or CSV, optionally gzipped. Rows are streamed from a
+    server-side cursor in primary key order, so any table size exports in
+    constant memory. Same as `python manage_db.py export`.
+    """
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_table(table, format, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,13 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..config import settings
+from ..db import get_async_db, get_db
 from ..models.farmer import Farmer
-from ..schemas.farmer import FarmerCreate, FarmerOut
+from ..pagination import before, decode_cursor, page_size_query, paginate
+from ..schemas.farmer import FarmerCreate, FarmerImportResult, FarmerNear, FarmerOut
+from ..services.bulk_io import format_for
+from ..services.farmer_filters import bbox_clause, filter_farmers, near_query
+from ..services.farmer_import import import_farmers
+from ..services.geo import BBox, haversine_km
 
 
 router = APIRouter(prefix="/farmers", tags=["farmers"])
 
 
+def parse_bbox(text: str) -> BBox:
+    """A `min_lat,min_lon,max_lat,max_lon` query value; bad boxes are a 400."""
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(v) for v in text.split(","))
+    except ValueError:
+        raise HTTPException(400, "bbox must be min_lat,min_lon,max_lat,max_lon")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        raise HTTPException(400, "bbox is out of range or inverted")
+    return (min_lat, min_lon, max_lat, max_lon)
+
+
 @router.post("/", response_model=FarmerOut)
 def create_farmer(payload: FarmerCreate, db: Session = Depends(get_db)):
     # Pydantic v2: use model_dump for dict conversion
@@ -18,9 +41,126 @@ def create_farmer(payload: FarmerCreate, db: Session = Depends(get_db)):
     return farmer
 
 
+@router.post("/import", response_model=FarmerImportResult)
+async def import_farmers_upload(
+    request: Request,
+    format: Optional[str] = Query(default=None, pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Onboard many farmers in one request from a CSV (header row of
+    FarmerCreate field names) or NDJSON body, read as it streams in. The
+    format comes from `format` or else the Content-Type (`text/csv`,
+    `application/x-ndjson`). A farmer whose phone is already stored is
+    updated instead of duplicated, in the columns the row gives (empty
+    cells keep the stored value); invalid rows are reported per line and
+    do not stop the rest. Same as `python manage_db.py import`.
+    """
+    fmt = format or format_for(request.headers.get("content-type"))
+    return await import_farmers(db, request.stream(), fmt)
+
+
 @router.get("/", response_model=list[FarmerOut])
-def list_farmers(db: Session = Depends(get_db)):
-    return db.query(Farmer).order_by(Farmer.id.desc()).all()
+def list_farmers(
+    response: Response,
+    fields: Optional[str] = None,
+    language: Optional[str] = None,
+    crop: Optional[str] = None,
+    soil_type: Optional[str] = None,
+    irrigation_type: Optional[str] = None,
+    bbox: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = page_size_query(),
+    db: Session = Depends(get_db),
+):
+    """
+    Farmers, newest first, one keyset page at a time: pass the
+    X-Next-Cursor response header back as `cursor` for the next page.
+    `fields=id,name,phone` selects only those columns (id is always
+    included). `crop` matches any name of the crop ("paddy" finds rice).
+    `bbox=min_lat,min_lon,max_lat,max_lon` keeps farmers located inside it.
+    """
+    if fields:
+        names = list(dict.fromkeys(["id", *(f.strip() for f in fields.split(","))]))
+        unknown = [n for n in names if n not in FarmerOut.model_fields]
+        if unknown:
+            raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+        stmt = select(*(getattr(Farmer, n) for n in names))
+    else:
+        stmt = select(Farmer)
+    stmt = filter_farmers(stmt, language, crop, soil_type, irrigation_type)
+    if bbox:
+        stmt = stmt.where(bbox_clause(parse_bbox(bbox), db.bind.dialect.name))
+    if cursor:
+        stmt = stmt.where(before([Farmer.id], decode_cursor(cursor, (int,))))
+    stmt = stmt.order_by(Farmer.id.desc()).limit(limit + 1)
+
+    if not fields:
+        rows = db.scalars(stmt).all()
+        return paginate(rows, limit, lambda f: (f.id,), response)
+    # projected rows skip the response model, which needs every field
+    rows = [row._asdict() for row in db.execute(stmt)]
+    rows = paginate(rows, limit, lambda f: (f["id"],), response)
+    return JSONResponse(jsonable_encoder(rows), headers=dict(response.headers))
+
+
+@router.get("/near", response_model=list[FarmerNear])
+def farmers_near(
+    response: Response,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius_km: float = Query(gt=0, le=settings.FARMER_NEAR_MAX_RADIUS_KM),
+    language: Optional[str] = None,
+    crop: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = page_size_query(),
+    db: Session = Depends(get_db),
+):
+    """
+    Farmers within `radius_km` of (lat, lon), nearest first, e.g. everyone
+    a weather alert covers. The database bounds and ranks the candidates
+    from the spatial index and returns keyset batches of ids; only those
+    farmers are loaded and their great-circle distances checked. The bound
+    is slightly generous, so batches are fetched until a full page passes
+    the exact check. Paged like GET /farmers/ through X-Next-Cursor.
+    """
+    stmt, rank, id_col = near_query(
+        lat, lon, radius_km, db.bind.dialect.name, language, crop
+    )
+    after = decode_cursor(cursor, (float, int)) if cursor else None
+    near = []
+    while len(near) <= limit:
+        batch = stmt
+        if after:
+            after_rank, after_id = after
+            batch = batch.where(
+                or_(rank > after_rank, and_(rank == after_rank, id_col > after_id))
+            )
+        rows = db.execute(batch.order_by(rank, id_col).limit(limit + 1)).all()
+        farmers = {
+            f.id: f
+            for f in db.scalars(
+                select(Farmer).where(Farmer.id.in_([r.id for r in rows]))
+            )
+        }
+        for row in rows:
+            farmer = farmers[row.id]
+            distance = haversine_km(lat, lon, farmer.latitude, farmer.longitude)
+            if distance <= radius_km:
+                near.append((row, farmer, distance))
+        if len(rows) <= limit:
+            break
+        after = (rows[-1].rank, rows[-1].id)
+
+    # the cursor resumes after the last farmer kept, not the last fetched
+    near = paginate(near, limit, lambda item: (item[0].rank, item[0].id), response)
+    return [
+        FarmerNear(
+            **FarmerOut.model_validate(farmer).model_dump(),
+            distance_km=round(distance, 3),
+        )
+        for _, farmer, distance in near
+    ]
 
 
 @router.get("/{farmer_id}", response_model=FarmerOut)
@@ -1,5 +1,16 @@
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from pydantic import BaseModel, field_validator
 from typing import Optional
+from .bulk import BulkRowError
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Activity times are stored in UTC; naive times are taken to be UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
 
 
 class ActivityCreate(BaseModel):
@@ -8,6 +19,14 @@ class ActivityCreate(BaseModel):
     notes: Optional[str] = None
     quantity: Optional[float] = None
     unit: Optional[str] = None
+    # when the activity happened, e.g. as logged on an offline device;
+    # defaults to the time it is stored
+    at: Optional[datetime] = None
+
+    @field_validator("at")
+    @classmethod
+    def _at_in_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return as_utc(value)
 
 
 class ActivityOut(ActivityCreate):
@@ -15,3 +34,12 @@ class ActivityOut(ActivityCreate):
 
     class Config:
         from_attributes = True
+
+
+class ActivityBulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    # the first ACTIVITY_BULK_MAX_ERRORS failures, by NDJSON line number
+    errors: list[BulkRowError]
+    timings_ms: dict[str, float]
@@ -1,7 +1,7 @@
 # backend/app/schemas/advisory.py
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AdvisoryBase(BaseModel):
@@ -32,3 +32,44 @@ class AdvisoryOut(BaseModel):
     created_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AdvisoryBatchRequest(BaseModel):
+    """Which farmers a batch run covers; all filters are optional and ANDed."""
+
+    farmer_ids: Optional[list[int]] = None
+    language: Optional[str] = None
+    crop: Optional[str] = None
+    limit: Optional[int] = Field(default=None, ge=1)
+    # (min_lat, min_lon, max_lat, max_lon), e.g. a district
+    bbox: Optional[tuple[float, float, float, float]] = None
+    # recompute even farmers whose forecast and profile are unchanged
+    force_refresh: bool = False
+
+
+class AdvisoryBatchResult(BaseModel):
+    farmers: int
+    skipped_farmers: int
+    unchanged_farmers: int = 0
+    cells: int
+    failed_cells: int
+    advisories: int
+    timings_ms: dict[str, float]
+
+
+class ScheduledJobOut(BaseModel):
+    name: str
+    owner: Optional[str] = None
+    status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    locked_until: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    runs: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_result: Optional[dict] = None
+    # live stage/done/total, when this worker holds the run
+    progress: Optional[dict] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class BulkRowError(BaseModel):
+    # line number in the uploaded NDJSON/CSV body
+    line: int
+    error: str
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
+from .bulk import BulkRowError
 
 
 class FarmerCreate(BaseModel):
@@ -19,3 +20,19 @@ class FarmerOut(FarmerCreate):
 
     class Config:
         from_attributes = True
+
+
+class FarmerNear(FarmerOut):
+    # great-circle distance from the searched point
+    distance_km: float
+
+
+class FarmerImportResult(BaseModel):
+    received: int
+    inserted: int
+    # rows whose phone matched a stored farmer
+    updated: int
+    failed: int
+    # the first FARMER_IMPORT_MAX_ERRORS failures, by line number
+    errors: list[BulkRowError]
+    timings_ms: dict[str, float]
@@ -0,0 +1,92 @@
+from typing import AsyncIterable, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.activity import Activity
+from ..models.advisory import utcnow
+from ..models.farmer import Farmer
+from ..schemas.activity import ActivityCreate
+from .advisory_batch import StageTimer
+from .bulk_io import BulkResult, ndjson_lines, validation_message
+
+
+async def _insert_chunk(
+    db: AsyncSession, chunk: List[Tuple[int, Dict]], result: BulkResult
+) -> None:
+    """
+    One transaction: drop rows whose farmer does not exist (one IN query for
+    the chunk), then a single executemany INSERT of the rest.
+    """
+    farmer_ids = {row["farmer_id"] for _, row in chunk}
+    known = set(await db.scalars(select(Farmer.id).where(Farmer.id.in_(farmer_ids))))
+    rows = []
+    for line, row in chunk:
+        if row["farmer_id"] in known:
+            rows.append(row)
+        else:
+            result.fail(line, f"farmer {row['farmer_id']} not found")
+    if not rows:
+        await db.rollback()
+        return
+    try:
+        conn = await db.connection()
+        await conn.execute(insert(Activity), rows)
+        await db.commit()
+        result.inserted += len(rows)
+    except DBAPIError as e:
+        # the whole chunk rolls back; earlier chunks stay committed
+        await db.rollback()
+        message = f"insert failed: {type(e.orig).__name__}: {e.orig}"
+        for line, row in chunk:
+            if row["farmer_id"] in known:
+                result.fail(line, message)
+
+
+async def ingest_activities(
+    db: AsyncSession,
+    body: AsyncIterable[bytes],
+    chunk_size: int = 0,
+) -> Dict:
+    """
+    Store the activities in an NDJSON stream of ActivityCreate objects.
+
+    Lines are validated as they arrive, so the body is never held in
+    memory. Valid rows are inserted `chunk_size` at a time, one transaction
+    per chunk; a bad line or unknown farmer only fails that row. Rows
+    without `at` get the time the stream was received.
+    """
+    chunk_size = chunk_size or settings.ACTIVITY_BULK_CHUNK
+    result = BulkResult(settings.ACTIVITY_BULK_MAX_ERRORS)
+    timer = StageTimer()
+    received_at = utcnow()
+    chunk: List[Tuple[int, Dict]] = []
+    async for line, raw in ndjson_lines(body):
+        result.received += 1
+        try:
+            activity = ActivityCreate.model_validate_json(raw)
+        except ValidationError as e:
+            result.fail(line, validation_message(e))
+            continue
+        row = activity.model_dump()
+        row["at"] = row["at"] or received_at
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            timer.lap("parse")
+            await _insert_chunk(db, chunk, result)
+            timer.lap("insert")
+            chunk = []
+    timer.lap("parse")
+    if chunk:
+        await _insert_chunk(db, chunk, result)
+        timer.lap("insert")
+    return {
+        "received": result.received,
+        "inserted": result.inserted,
+        "failed": result.failed,
+        "errors": result.sorted_errors(),
+        "timings_ms": timer.timings,
+    }
@@ -0,0 +1,254 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.advisory_run import AdvisoryRun
+from ..models.farmer import Farmer
+from ..schemas.advisory import AdvisoryBatchRequest
+from .advisory_store import (
+    insert_advisories,
+    mark_materialized,
+    record_runs,
+    run_record,
+)
+from .crops import crop_registry
+from .farmer_filters import bbox_clause, filter_farmers
+from .rule_engine import default_ruleset, evaluate_chunk
+from .weather import Cell, cell_center, get_forecast, grid_cell
+
+
+# progress(stage, done, total) callback for long runs
+Progress = Callable[[str, int, int], None]
+
+
+class StageTimer:
+    """
+    Wall-clock milliseconds per named pipeline stage; a stage lapped more
+    than once (e.g. per chunk) accumulates.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000 + self.timings.get(stage, 0.0)
+        self.timings[stage] = round(elapsed, 1)
+        self._last = now
+
+
+def farmer_filter_query(filters: AdvisoryBatchRequest, dialect: str):
+    stmt = (
+        select(
+            Farmer.id,
+            Farmer.latitude,
+            Farmer.longitude,
+            Farmer.crops,
+            AdvisoryRun.forecast_fingerprint,
+            AdvisoryRun.profile_fingerprint,
+        )
+        .outerjoin(AdvisoryRun, AdvisoryRun.farmer_id == Farmer.id)
+        .where(Farmer.latitude.is_not(None), Farmer.longitude.is_not(None))
+    )
+    if filters.farmer_ids:
+        stmt = stmt.where(Farmer.id.in_(filters.farmer_ids))
+    if filters.bbox:
+        stmt = stmt.where(bbox_clause(filters.bbox, dialect))
+    stmt = filter_farmers(stmt, language=filters.language, crop=filters.crop)
+    stmt = stmt.order_by(Farmer.id)
+    if filters.limit:
+        stmt = stmt.limit(filters.limit)
+    return stmt
+
+
+async def fetch_cells(
+    cells: List[Cell], client: Optional[httpx.AsyncClient] = None
+) -> Dict[Cell, Any]:
+    """
+    Forecast (or the exception raised fetching it) for every cell, with at
+    most ADVISORY_BATCH_FETCH_CONCURRENCY upstream requests in flight.
+    """
+    sem = asyncio.Semaphore(settings.ADVISORY_BATCH_FETCH_CONCURRENCY)
+
+    async def fetch(cell: Cell):
+        async with sem:
+            return await get_forecast(*cell_center(cell), client)
+
+    results = await asyncio.gather(*(fetch(c) for c in cells), return_exceptions=True)
+    return dict(zip(cells, results))
+
+
+async def evaluate_in_pool(
+    executor: Executor,
+    forecasts: Sequence[Dict],
+    crops: Sequence[Tuple[str, ...]],
+    forecast_index: Sequence[int],
+    chunk_size: int,
+    progress: Optional[Progress] = None,
+) -> List[List[Dict[str, str]]]:
+    """
+    Evaluate the rule set over farmer chunks in `executor`. Each chunk is
+    sent only the forecasts it references; farmers arrive grouped by cell,
+    so that is usually a handful per chunk.
+    """
+    loop = asyncio.get_running_loop()
+    total, done = len(crops), 0
+    futures = []
+    for start in range(0, total, chunk_size):
+        index = forecast_index[start : start + chunk_size]
+        used = sorted(set(index))
+        local = {g: i for i, g in enumerate(used)}
+        futures.append(
+            loop.run_in_executor(
+                executor,
+                evaluate_chunk,
+                [forecasts[g] for g in used],
+                crops[start : start + chunk_size],
+                [local[g] for g in index],
+            )
+        )
+
+    def chunk_done(future) -> None:
+        nonlocal done
+        if progress is not None and not future.cancelled() and not future.exception():
+            done += len(future.result())
+            progress("evaluate_rules", done, total)
+
+    for future in futures:
+        future.add_done_callback(chunk_done)
+    results = []
+    for part in await asyncio.gather(*futures):
+        results.extend(part)
+    return results
+
+
+async def run_batch(
+    db: AsyncSession,
+    filters: AdvisoryBatchRequest,
+    client: Optional[httpx.AsyncClient] = None,
+    executor: Optional[Executor] = None,
+    progress: Optional[Progress] = None,
+    materialize: bool = False,
+) -> Dict[str, Any]:
+    """
+    Generate and store rule advisories for every farmer matching `filters`.
+
+    Farmers are grouped by forecast grid cell so each cell is fetched once,
+    however many farmers share it; the rule set is evaluated over the whole
+    batch in one vectorized pass, and all advisories are then written with
+    chunked bulk INSERTs in one transaction.
+
+    Farmers whose cell forecast and profile fingerprints match their last
+    run are left untouched (unless `filters.force_refresh`): only farmers
+    whose inputs changed are evaluated and written.
+
+    With an `executor` (e.g. a process pool) the rules are evaluated there
+    in ADVISORY_BATCH_CHUNK-farmer chunks instead of on the event loop.
+    `materialize` (scheduled jobs) marks every run written or found
+    unchanged as materialized today, for /advisories/for/{id} to serve.
+    """
+    timer = StageTimer()
+    farmers = (
+        await db.execute(farmer_filter_query(filters, db.bind.dialect.name))
+    ).all()
+    timer.lap("load_farmers")
+
+    by_cell: Dict[Cell, list] = defaultdict(list)
+    skipped = 0
+    for farmer in farmers:
+        if not (math.isfinite(farmer.latitude) and math.isfinite(farmer.longitude)):
+            skipped += 1
+            continue
+        by_cell[grid_cell(farmer.latitude, farmer.longitude)].append(farmer)
+    if progress is not None:
+        progress("fetch_forecasts", 0, len(by_cell))
+    forecasts = await fetch_cells(list(by_cell), client)
+    timer.lap("fetch_forecasts")
+
+    # one forecast row per cell; farmers point at their cell's row
+    cell_forecasts, members, forecast_index, fingerprints = [], [], [], []
+    unchanged_ids: Dict[Cell, List[int]] = defaultdict(list)
+    failed_cells = unchanged = 0
+    for cell, cell_members in by_cell.items():
+        forecast = forecasts[cell]
+        if isinstance(forecast, Exception):
+            failed_cells += 1
+            skipped += len(cell_members)
+            continue
+        forecast_fp = default_ruleset.forecast_fingerprint(forecast)
+        for farmer in cell_members:
+            crop_keys = crop_registry.parse(farmer.crops)
+            profile_fp = default_ruleset.profile_fingerprint(crop_keys)
+            if not filters.force_refresh and (
+                farmer.forecast_fingerprint == forecast_fp
+                and farmer.profile_fingerprint == profile_fp
+            ):
+                unchanged += 1
+                unchanged_ids[cell].append(farmer.id)
+                continue
+            members.append((farmer, crop_keys, cell))
+            forecast_index.append(len(cell_forecasts))
+            fingerprints.append((forecast_fp, profile_fp))
+        cell_forecasts.append(forecast)
+
+    crops = [keys for _, keys, _ in members]
+    if progress is not None:
+        progress("evaluate_rules", 0, len(crops))
+    if executor is None:
+        results = default_ruleset.evaluate(cell_forecasts, crops, forecast_index)
+    else:
+        results = await evaluate_in_pool(
+            executor,
+            cell_forecasts,
+            crops,
+            forecast_index,
+            settings.ADVISORY_BATCH_CHUNK,
+            progress,
+        )
+    rows, runs = [], []
+    for (farmer, _, cell), (forecast_fp, profile_fp), advs in zip(
+        members, fingerprints, results
+    ):
+        farmer_rows = [
+            {
+                "farmer_id": farmer.id,
+                "text": a["text"],
+                "severity": a["severity"],
+                "source": a["source"],
+            }
+            for a in advs
+        ]
+        rows.extend(farmer_rows)
+        runs.append(
+            run_record(
+                farmer.id, forecast_fp, profile_fp, farmer_rows, cell, materialize
+            )
+        )
+    timer.lap("evaluate_rules")
+
+    if progress is not None:
+        progress("persist", 0, len(rows))
+    await record_runs(db, runs)
+    if materialize:
+        await mark_materialized(db, unchanged_ids, settings.ADVISORY_BATCH_CHUNK)
+    written = await insert_advisories(db, rows, settings.ADVISORY_BATCH_CHUNK)
+    timer.lap("persist")
+
+    return {
+        "farmers": len(farmers) - skipped,
+        "skipped_farmers": skipped,
+        "unchanged_farmers": unchanged,
+        "cells": len(by_cell),
+        "failed_cells": failed_cells,
+        "advisories": written,
+        "timings_ms": timer.timings,
+    }
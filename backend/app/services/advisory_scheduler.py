@@ -0,0 +1,275 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models.scheduled_job import ScheduledJob
+from ..schemas.advisory import AdvisoryBatchRequest
+from .advisory_batch import run_batch
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """One ADVISORY_JOBS entry: a daily run at hour:minute over `bbox`."""
+
+    name: str
+    hour: int
+    minute: int
+    bbox: Optional[Tuple[float, float, float, float]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobSpec":
+        hour, _, minute = str(data["time"]).partition(":")
+        spec = cls(
+            name=data["name"],
+            hour=int(hour),
+            minute=int(minute or 0),
+            bbox=tuple(data["bbox"]) if data.get("bbox") else None,
+        )
+        if not (0 <= spec.hour < 24 and 0 <= spec.minute < 60):
+            raise ValueError(f"{spec.name}: invalid time {data['time']!r}")
+        if spec.bbox is not None and len(spec.bbox) != 4:
+            raise ValueError(f"{spec.name}: bbox needs 4 numbers")
+        return spec
+
+
+def job_specs(entries: List[Dict[str, Any]]) -> List[JobSpec]:
+    specs = [JobSpec.from_dict(e) for e in entries]
+    names = [s.name for s in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("ADVISORY_JOBS names must be unique")
+    return specs
+
+
+class JobProgress:
+    """Live state of a job in this worker: stage, progress and counters."""
+
+    def __init__(self):
+        self.state = "idle"  # idle/running/succeeded/failed
+        self.stage: Optional[str] = None
+        self.done = 0
+        self.total = 0
+        self.started_at: Optional[datetime] = None
+        self.duration_ms: Optional[float] = None
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0  # another worker held the lease
+        self.last_error: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def update(self, stage: str, done: int, total: int) -> None:
+        self.stage, self.done, self.total = stage, done, total
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+        }
+
+
+async def acquire_lease(
+    db: AsyncSession, name: str, owner: str, lease_seconds: int
+) -> bool:
+    """
+    Take the job's lease if it is free or expired. Whichever worker's UPDATE
+    (or first INSERT) wins owns the run; the others see no row change.
+    """
+    now = datetime.now(timezone.utc)
+    values = {
+        "owner": owner,
+        "locked_until": now + timedelta(seconds=lease_seconds),
+        "started_at": now,
+        "finished_at": None,
+        "status": "running",
+    }
+    result = await db.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.locked_until < now)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        await db.commit()
+        return True
+    try:
+        db.add(ScheduledJob(name=name, runs=0, failures=0, **values))
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+        return False
+
+
+async def record_outcome(
+    db: AsyncSession,
+    name: str,
+    duration_ms: float,
+    error: Optional[str] = None,
+    result: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Store the run's outcome; the lease is kept until it expires."""
+    await db.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == name)
+        .values(
+            finished_at=datetime.now(timezone.utc),
+            status="failed" if error else "succeeded",
+            duration_ms=duration_ms,
+            runs=ScheduledJob.runs + 1,
+            failures=ScheduledJob.failures + (1 if error else 0),
+            last_error=error,
+            last_result=result,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+class AdvisoryScheduler:
+    """
+    Morning advisory runs. Each ADVISORY_JOBS entry is a cron job on the
+    worker's event loop that fetches every farmer cell in its area once,
+    evaluates the rules in a process pool and stores the advisories and
+    their runs, so /advisories/for/{id} can serve them without recomputing.
+    Every worker schedules the jobs; the DB lease lets one of them run each.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, JobProgress] = {}
+        self._scheduler: Optional[AsyncIOScheduler] = None
+        self._executor: Optional[Executor] = None
+
+    @property
+    def owner(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            workers = settings.ADVISORY_JOB_WORKERS or os.cpu_count() or 1
+            # never fork: the uvicorn worker already runs threads (aiosqlite,
+            # the sync-route threadpool) whose locks a forked child inherits
+            method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+        return self._executor
+
+    def start(self) -> None:
+        tz = settings.ADVISORY_JOB_TIMEZONE
+        self._scheduler = AsyncIOScheduler(timezone=tz)
+        for spec in job_specs(settings.ADVISORY_JOBS):
+            self.jobs.setdefault(spec.name, JobProgress())
+            self._scheduler.add_job(
+                self.run_job,
+                CronTrigger(hour=spec.hour, minute=spec.minute, timezone=tz),
+                args=[spec],
+                id=spec.name,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=settings.ADVISORY_JOB_LEASE_SECONDS,
+            )
+        self._scheduler.start()
+
+    def shutdown(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run_job(
+        self,
+        spec: JobSpec,
+        client: Optional[httpx.AsyncClient] = None,
+        executor: Optional[Executor] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run one job if this worker gets the lease. Returns the batch result,
+        or None if the lease was held elsewhere or the run failed.
+        """
+        progress = self.jobs.setdefault(spec.name, JobProgress())
+        async with AsyncSessionLocal() as db:
+            leased = await acquire_lease(
+                db, spec.name, self.owner, settings.ADVISORY_JOB_LEASE_SECONDS
+            )
+        if not leased:
+            progress.skipped += 1
+            return None
+
+        progress.state = "running"
+        progress.started_at = datetime.now(timezone.utc)
+        progress.update("load_farmers", 0, 0)
+        started = time.perf_counter()
+        error, result = None, None
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await run_batch(
+                    db,
+                    AdvisoryBatchRequest(bbox=spec.bbox),
+                    client,
+                    executor or self.executor,
+                    progress.update,
+                    materialize=True,
+                )
+        except Exception as e:
+            logger.exception("advisory job %s failed", spec.name)
+            error = f"{type(e).__name__}: {e}"
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        progress.state = "failed" if error else "succeeded"
+        progress.duration_ms = duration_ms
+        progress.runs += 1
+        progress.failures += 1 if error else 0
+        progress.last_error = error
+        progress.last_result = result
+        async with AsyncSessionLocal() as db:
+            await record_outcome(db, spec.name, duration_ms, error, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.ADVISORY_SCHEDULER_ENABLED,
+            "running": self._scheduler is not None,
+            "owner": self.owner,
+            "jobs": {name: p.as_dict() for name, p in self.jobs.items()},
+        }
+
+
+async def job_statuses(db: AsyncSession) -> List[ScheduledJob]:
+    """Last recorded run of every job, from whichever worker ran it."""
+    return list(await db.scalars(select(ScheduledJob).order_by(ScheduledJob.name)))
+
+
+advisory_scheduler = AdvisoryScheduler()
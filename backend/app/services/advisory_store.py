@@ -0,0 +1,261 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.advisory import Advisory, advisory_day, content_hash
+from ..models.advisory_run import AdvisoryRun
+from .weather import Cell
+
+
+# dialects with INSERT ... ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def insert_ignoring_duplicates(db: AsyncSession):
+    """
+    INSERT that skips rows colliding with the advisory dedup index. Other
+    backends get a plain INSERT, so duplicates raise IntegrityError there.
+    """
+    make_insert = _UPSERT_INSERTS.get(db.bind.dialect.name)
+    if make_insert is None:
+        return insert(Advisory)
+    return make_insert(Advisory).on_conflict_do_nothing()
+
+
+def with_dedup_key(row: Dict) -> Dict:
+    row = dict(row)
+    row.setdefault("severity", "info")
+    row.setdefault("content_hash", content_hash(row["text"]))
+    row.setdefault("day", advisory_day())
+    return row
+
+
+async def persist_advisories(db: AsyncSession, rows: Iterable[Dict]) -> List[Advisory]:
+    """
+    Insert advisories (dicts of farmer_id, text, severity, source) in a single
+    transaction and return them with ids and created_at populated.
+
+    Rows that duplicate an advisory already stored for the same farmer,
+    text and severity today are not inserted again; the stored row is
+    returned in their place. Where the backend supports INSERT ... RETURNING
+    for many rows (SQLite 3.35+, PostgreSQL) a run with no duplicates is one
+    multi-VALUES statement and no follow-up SELECT. Rows come back in no
+    guaranteed order.
+    """
+    rows = [with_dedup_key(row) for row in rows]
+    if not rows:
+        return []
+
+    stmt = insert_ignoring_duplicates(db)
+    if db.bind.dialect.insert_executemany_returning:
+        advisories = list(await db.scalars(stmt.returning(Advisory), rows))
+        await db.commit()
+        if len(advisories) == len(rows):
+            return advisories
+    else:
+        await db.execute(stmt, rows)
+        await db.commit()
+
+    keys = {(r["farmer_id"], r["content_hash"], r["severity"], r["day"]) for r in rows}
+    result = await db.scalars(
+        select(Advisory).where(
+            Advisory.farmer_id.in_({k[0] for k in keys}),
+            Advisory.content_hash.in_({k[1] for k in keys}),
+            Advisory.day.in_({k[3] for k in keys}),
+        )
+    )
+    return [
+        a for a in result if (a.farmer_id, a.content_hash, a.severity, a.day) in keys
+    ]
+
+
+async def insert_advisories(
+    db: AsyncSession, rows: Iterable[Dict], chunk_size: int = 1000
+) -> int:
+    """
+    Bulk path for batch runs: executemany INSERTs of `chunk_size` rows, one
+    commit at the end, nothing read back. Rows already stored today are
+    skipped; returns the number of rows actually written.
+    """
+    written = 0
+    stmt = insert_ignoring_duplicates(db)
+    # Core execution on the session's connection, for the cursor rowcount
+    conn = await db.connection()
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        result = await conn.execute(stmt, chunk)
+        written += result.rowcount if result.rowcount >= 0 else len(chunk)
+    await db.commit()
+    return written
+
+
+def cell_key(cell: Cell) -> str:
+    return f"{cell[0]},{cell[1]}"
+
+
+def run_record(
+    farmer_id: int,
+    forecast_fingerprint: str,
+    profile_fingerprint: str,
+    rows,
+    cell: Optional[Cell] = None,
+    materialized: bool = False,
+) -> Dict:
+    """
+    AdvisoryRun values for a computation that produced `rows` from the
+    forecast of `cell`; `materialized` marks a scheduled job's run.
+    """
+    rows = [with_dedup_key(row) for row in rows]
+    return {
+        "farmer_id": farmer_id,
+        "forecast_fingerprint": forecast_fingerprint,
+        "profile_fingerprint": profile_fingerprint,
+        "day": rows[0]["day"] if rows else advisory_day(),
+        "advisories": [[r["content_hash"], r["severity"]] for r in rows],
+        "cell": cell_key(cell) if cell is not None else None,
+        "materialized_on": advisory_day() if materialized else None,
+    }
+
+
+async def record_runs(db: AsyncSession, runs: List[Dict]) -> None:
+    """
+    Upsert AdvisoryRun rows (see run_record) without committing, so they
+    land in the same transaction as the advisories they describe.
+    """
+    if not runs:
+        return
+    make_insert = _UPSERT_INSERTS.get(db.bind.dialect.name)
+    if make_insert is None:
+        for run in runs:
+            await db.merge(AdvisoryRun(**run))
+        return
+    stmt = make_insert(AdvisoryRun)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AdvisoryRun.farmer_id],
+        set_={
+            "forecast_fingerprint": stmt.excluded.forecast_fingerprint,
+            "profile_fingerprint": stmt.excluded.profile_fingerprint,
+            "day": stmt.excluded.day,
+            "advisories": stmt.excluded.advisories,
+            "cell": stmt.excluded.cell,
+            "materialized_on": stmt.excluded.materialized_on,
+            "computed_at": func.now(),
+        },
+    )
+    conn = await db.connection()
+    await conn.execute(stmt, runs)
+
+
+async def mark_materialized(
+    db: AsyncSession, farmer_ids: Dict[Cell, List[int]], chunk_size: int = 1000
+) -> None:
+    """
+    Mark runs a scheduled job found still current (same forecast and
+    profile) as materialized today for their cell, without committing.
+    """
+    today = advisory_day()
+    for cell, ids in farmer_ids.items():
+        for start in range(0, len(ids), chunk_size):
+            await db.execute(
+                update(AdvisoryRun)
+                .where(AdvisoryRun.farmer_id.in_(ids[start : start + chunk_size]))
+                .values(cell=cell_key(cell), materialized_on=today)
+                .execution_options(synchronize_session=False)
+            )
+
+
+async def _run_advisories(
+    db: AsyncSession, run: AdvisoryRun
+) -> Optional[List[Advisory]]:
+    """The advisories `run` produced, or None if any has since been deleted."""
+    keys = {(h, severity) for h, severity in run.advisories}
+    if not keys:
+        return []
+    result = await db.scalars(
+        select(Advisory)
+        .where(
+            Advisory.farmer_id == run.farmer_id,
+            Advisory.day == run.day,
+            Advisory.content_hash.in_({h for h, _ in keys}),
+        )
+        .order_by(Advisory.id)
+    )
+    advisories = [a for a in result if (a.content_hash, a.severity) in keys]
+    return advisories if len(advisories) == len(keys) else None
+
+
+async def unchanged_run_advisories(
+    db: AsyncSession,
+    farmer_id: int,
+    forecast_fingerprint: str,
+    profile_fingerprint: str,
+) -> Optional[List[Advisory]]:
+    """
+    The advisories of the farmer's last run if it was computed from the same
+    forecast and profile fingerprints and its rows are all still stored;
+    None when the advisories need recomputing.
+    """
+    run = await db.get(AdvisoryRun, farmer_id)
+    if (
+        run is None
+        or run.forecast_fingerprint != forecast_fingerprint
+        or run.profile_fingerprint != profile_fingerprint
+    ):
+        return None
+    return await _run_advisories(db, run)
+
+
+async def materialized_run_advisories(
+    db: AsyncSession,
+    farmer_id: int,
+    profile_fingerprint: str,
+    cell: Cell,
+    max_age_seconds: int,
+    forecast_fingerprint: Optional[str] = None,
+) -> Optional[List[Advisory]]:
+    """
+    The advisories of the farmer's last run if a scheduled job computed or
+    confirmed it today, within `max_age_seconds`, for the farmer's current
+    cell and profile, without fetching the forecast. A known
+    `forecast_fingerprint` (e.g. of a cached forecast) must match as well.
+    None otherwise.
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    stmt = select(AdvisoryRun).where(
+        AdvisoryRun.farmer_id == farmer_id,
+        AdvisoryRun.materialized_on == advisory_day(),
+        AdvisoryRun.cell == cell_key(cell),
+        AdvisoryRun.profile_fingerprint == profile_fingerprint,
+        AdvisoryRun.computed_at >= since,
+    )
+    if forecast_fingerprint is not None:
+        stmt = stmt.where(AdvisoryRun.forecast_fingerprint == forecast_fingerprint)
+    run = await db.scalar(stmt)
+    if run is None:
+        return None
+    return await _run_advisories(db, run)
+
+
+async def fresh_run_advisories(
+    db: AsyncSession, farmer_id: int, profile_fingerprint: str, max_age_seconds: int
+) -> Optional[List[Advisory]]:
+    """
+    The advisories of the farmer's last run if it was computed within
+    `max_age_seconds` for the current profile, without looking at the
+    forecast at all; None otherwise.
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=max_age_seconds)
+    run = await db.scalar(
+        select(AdvisoryRun).where(
+            AdvisoryRun.farmer_id == farmer_id,
+            AdvisoryRun.profile_fingerprint == profile_fingerprint,
+            AdvisoryRun.computed_at >= since,
+        )
+    )
+    if run is None:
+        return None
+    return await _run_advisories(db, run)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.ai_cache import AIResponseCache
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.sweeps = 0
+        # stores since the last eviction sweep, in this worker
+        self.since_sweep = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "sweeps": self.sweeps,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+response_cache_stats = CacheStats()
+
+
+def cache_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Stable key for a generation: whitespace-insensitive on the prompt, so
+    re-indented or re-wrapped prompt templates still hit.
+    """
+    blob = json.dumps(
+        {"model": model, "prompt": " ".join(prompt.split()), "options": options or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+async def get_cached_response(db: AsyncSession, key: str) -> Optional[str]:
+    """Unexpired cached response for `key`; a hit is a single indexed read."""
+    response = await db.scalar(
+        select(AIResponseCache.response).where(
+            AIResponseCache.key == key,
+            AIResponseCache.expires_at > datetime.now(timezone.utc),
+        )
+    )
+    if response is None:
+        response_cache_stats.misses += 1
+    else:
+        response_cache_stats.hits += 1
+    return response
+
+
+async def store_response(
+    db: AsyncSession, key: str, model: str, response: str
+) -> None:
+    """
+    Insert or replace the cached response. Every AI_CACHE_EVICT_EVERY
+    stores, a sweep then drops expired rows and the oldest rows beyond
+    AI_CACHE_MAX_ENTRIES, in its own transaction.
+    """
+    now = datetime.now(timezone.utc)
+    await db.merge(
+        AIResponseCache(
+            key=key,
+            model=model,
+            response=response,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.AI_CACHE_TTL_SECONDS),
+        )
+    )
+    await db.commit()
+    response_cache_stats.stores += 1
+    response_cache_stats.since_sweep += 1
+    if response_cache_stats.since_sweep >= settings.AI_CACHE_EVICT_EVERY:
+        response_cache_stats.since_sweep = 0
+        await evict_responses(db)
+
+
+async def evict_responses(db: AsyncSession) -> int:
+    """
+    Delete expired rows, then rows older than the AI_CACHE_MAX_ENTRIES-th
+    newest. Both are range deletes on an index, and the cutoff is found by
+    walking at most AI_CACHE_MAX_ENTRIES index entries, so a sweep never
+    scans the whole table. Returns the number of rows deleted.
+    """
+    now = datetime.now(timezone.utc)
+    expired = await db.execute(
+        delete(AIResponseCache)
+        .where(AIResponseCache.expires_at <= now)
+        .execution_options(synchronize_session=False)
+    )
+    evicted = expired.rowcount or 0
+    cutoff = await db.scalar(
+        select(AIResponseCache.created_at)
+        .order_by(AIResponseCache.created_at.desc())
+        .offset(settings.AI_CACHE_MAX_ENTRIES)
+        .limit(1)
+    )
+    if cutoff is not None:
+        overflow = await db.execute(
+            delete(AIResponseCache)
+            .where(AIResponseCache.created_at <= cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        evicted += overflow.rowcount or 0
+    await db.commit()
+    response_cache_stats.sweeps += 1
+    response_cache_stats.evictions += evicted
+    return evicted
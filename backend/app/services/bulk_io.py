@@ -0,0 +1,142 @@
+import codecs
+import csv
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from pydantic import BaseModel, ValidationError
+
+
+# streamed upload formats, and the Content-Types that select them
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+# one record as read off the wire: an NDJSON line, or a CSV row by header
+Record = Union[bytes, Dict[str, str]]
+M = TypeVar("M", bound=BaseModel)
+
+
+async def ndjson_lines(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """(line number, line) for each non-blank line of a streamed NDJSON body."""
+    buffer, lineno = b"", 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            lineno += 1
+            if line.strip():
+                yield lineno, line
+    if buffer.strip():
+        yield lineno + 1, buffer
+
+
+async def _text_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # utf-8-sig drops the BOM spreadsheet exports start with
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def csv_rows(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+    """
+    (line number, row by header) for each row of a streamed CSV body whose
+    first row is a header. Quoted fields may span lines; a row is numbered
+    by the line it starts on.
+    """
+    header = None
+    record: List[str] = []
+    quotes = start = lineno = 0
+    async for line in _text_lines(chunks):
+        lineno += 1
+        if not record:
+            start = lineno
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # a quoted field carries on to the next line
+        text = "\n".join(record)
+        record, quotes = [], 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+        else:
+            yield start, dict(zip(header, values))
+    if record and header is not None:
+        # unterminated quote: let validation report what is left
+        yield start, dict(zip(header, next(csv.reader(["\n".join(record)]))))
+
+
+def format_for(content_type: Optional[str], default: str = "ndjson") -> str:
+    """Upload format named by a Content-Type header, e.g. "text/csv; charset=utf-8"."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPES.get(media_type, default)
+
+
+def read_records(
+    chunks: AsyncIterable[bytes], fmt: str
+) -> AsyncIterator[Tuple[int, Record]]:
+    if fmt == "csv":
+        return csv_rows(chunks)
+    if fmt == "ndjson":
+        return ndjson_lines(chunks)
+    raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+
+
+def validate_record(model: Type[M], record: Record) -> M:
+    """`model` from a record; empty CSV cells count as missing."""
+    if isinstance(record, bytes):
+        return model.model_validate_json(record)
+    return model.model_validate({k: v for k, v in record.items() if v != ""})
+
+
+def validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc'])) or 'line'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+class BulkResult:
+    """Counters and per-line errors of a bulk load; keeps the first `max_errors`."""
+
+    def __init__(self, max_errors: int):
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self._max_errors = max_errors
+
+    def fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self._max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def sorted_errors(self) -> List[Dict]:
+        # parse errors are found as lines arrive, the rest per chunk
+        return sorted(self.errors, key=lambda e: e["line"])
@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+
+CROPS_DIR = Path(__file__).resolve().parents[2] / "kb" / "crops"
+
+# farmers type "Paddy, Banana" or "paddy; banana" or "നെല്ല്/വാഴ"
+_SEPARATORS = re.compile(r"[,;/|\n]+")
+
+
+def normalize_crop(name: str) -> str:
+    """Case-, width- and whitespace-insensitive form of a crop name."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+@dataclass(frozen=True)
+class Crop:
+    """
+    One crop from kb/crops/<key>.md. The YAML front matter gives the
+    canonical `key`, display `name`, English `synonyms`, `malayalam` names
+    and the crop's advisory `rules` (dicts in the kb/rules format).
+    """
+
+    key: str
+    name: str
+    synonyms: Tuple[str, ...] = ()
+    malayalam: Tuple[str, ...] = ()
+    rules: Tuple[Dict[str, Any], ...] = field(default=(), compare=False)
+
+    @property
+    def aliases(self) -> Tuple[str, ...]:
+        return (self.key, self.name, *self.synonyms, *self.malayalam)
+
+
+def read_front_matter(path: Path) -> Dict[str, Any]:
+    text = path.read_text(encoding="utf-8")
+    if not text.startswith("---"):
+        return {}
+    _, front, _ = text.split("---", 2)
+    return yaml.safe_load(front) or {}
+
+
+class CropRegistry:
+    """
+    Crops indexed by normalized name. Every alias of a crop maps to its
+    canonical key, so resolving a farmer's crop is one dict lookup and crop
+    rules are looked up by key instead of matched against the raw string.
+    Crops without a KB entry keep their normalized name as their key.
+    """
+
+    def __init__(self, crops: List[Crop]):
+        self.crops: Dict[str, Crop] = {}
+        self._aliases: Dict[str, str] = {}
+        for crop in crops:
+            if crop.key in self.crops:
+                raise ValueError(f"duplicate crop key {crop.key!r}")
+            self.crops[crop.key] = crop
+            for alias in crop.aliases:
+                other = self._aliases.setdefault(normalize_crop(alias), crop.key)
+                if other != crop.key:
+                    raise ValueError(f"{alias!r} names both {other!r} and {crop.key!r}")
+        # farmers' crops strings repeat heavily, so parse each distinct one once
+        self.parse = lru_cache(maxsize=4096)(self._parse)
+
+    @classmethod
+    def from_dir(cls, path: Path) -> "CropRegistry":
+        crops = []
+        for md in sorted(path.glob("*.md")):
+            meta = read_front_matter(md)
+            key = normalize_crop(meta.get("key") or md.stem)
+            crops.append(
+                Crop(
+                    key=key,
+                    name=meta.get("name") or md.stem.title(),
+                    synonyms=tuple(meta.get("synonyms") or ()),
+                    malayalam=tuple(meta.get("malayalam") or ()),
+                    rules=tuple(meta.get("rules") or ()),
+                )
+            )
+        return cls(crops)
+
+    def __iter__(self) -> Iterator[Crop]:
+        return iter(self.crops.values())
+
+    def get(self, name: str) -> Optional[Crop]:
+        return self.crops.get(self.resolve(name))
+
+    def resolve(self, name: str) -> str:
+        normalized = normalize_crop(name)
+        return self._aliases.get(normalized, normalized)
+
+    def _parse(self, crops: Optional[str]) -> Tuple[str, ...]:
+        """Canonical keys in a farmer's crops string, de-duplicated, in order."""
+        if not crops:
+            return ()
+        keys = (self.resolve(t) for t in _SEPARATORS.split(crops) if t.strip())
+        return tuple(dict.fromkeys(keys))
+
+
+crop_registry = CropRegistry.from_dir(CROPS_DIR)
@@ -1,14 +1,24 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
 from fastembed import TextEmbedding
+from functools import lru_cache
 from typing import List
 
 
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=1)
+def get_embedder() -> TextEmbedding:
+    """Process-wide embedder; loading the ONNX model is the expensive part."""
+    return TextEmbedding(EMBEDDING_MODEL)
+
+
 class KBVectorStore:
     def __init__(self, url: str, collection: str):
         self.client = QdrantClient(url=url)
         self.collection = collection
-        self.embedder = TextEmbedding("sentence-transformers/all-MiniLM-L6-v2")
+        self.embedder = get_embedder()
         self._ensure_collection()
 
     def _ensure_collection(self):
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import math
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List, Sequence
+
+from sqlalchemy import Column, select
+
+from ..config import settings
+from ..db import AsyncSessionLocal
+from ..models.activity import Activity
+from ..models.advisory import Advisory
+from ..models.farmer import Farmer
+from ..models.farmer_crop import FarmerCrop
+
+
+EXPORT_TABLES = {
+    "farmers": Farmer,
+    "farmer_crops": FarmerCrop,
+    "activities": Activity,
+    "advisories": Advisory,
+}
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _value(value: Any) -> Any:
+    """
+    A column value as both formats write it: dates and datetimes in ISO
+    8601, non-finite floats (which JSON cannot hold) as null/empty.
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+async def _partitions(
+    columns: Sequence[Column], yield_per: int
+) -> AsyncIterator[Sequence[tuple]]:
+    """
+    The table's rows in primary key order, `yield_per` at a time, read
+    through a server-side cursor so only one partition is ever in memory.
+    """
+    table = columns[0].table
+    stmt = (
+        select(*columns)
+        .order_by(*table.primary_key.columns)
+        .execution_options(yield_per=yield_per)
+    )
+    # own session: the response body outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+
+
+async def _ndjson(
+    names: List[str], partitions: AsyncIterator[Sequence[tuple]]
+) -> AsyncIterator[bytes]:
+    async for rows in partitions:
+        lines = [
+            json.dumps(
+                dict(zip(names, map(_value, row))), ensure_ascii=False, allow_nan=False
+            )
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def _csv(
+    names: List[str], partitions: AsyncIterator[Sequence[tuple]]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    async for rows in partitions:
+        writer.writerows([list(map(_value, row)) for row in rows])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # header only: the table is empty
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """A gzip file of `chunks`, compressed as they stream through."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_table(
+    name: str, fmt: str, compress: bool = False, yield_per: int = 0
+) -> AsyncIterator[bytes]:
+    """
+    Every row of table `name` (an EXPORT_TABLES key) as NDJSON or CSV with
+    a header row, optionally gzipped. Memory use is bounded by `yield_per`
+    rows (default EXPORT_YIELD_PER) whatever the table size.
+    """
+    model = EXPORT_TABLES[name]
+    columns = list(model.__table__.columns)
+    names = [c.name for c in columns]
+    partitions = _partitions(columns, yield_per or settings.EXPORT_YIELD_PER)
+    if fmt == "csv":
+        chunks = _csv(names, partitions)
+    elif fmt == "ndjson":
+        chunks = _ndjson(names, partitions)
+    else:
+        raise ValueError(f"unknown format {fmt!r}, expected ndjson or csv")
+    return gzipped(chunks) if compress else chunks
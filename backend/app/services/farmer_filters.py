@@ -0,0 +1,143 @@
+import math
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, and_, or_, select
+from sqlalchemy.sql import ColumnElement
+
+from ..models.farmer import Farmer
+from ..models.farmer_crop import FarmerCrop
+from ..models.farmer_location import farmer_locations
+from .crops import crop_registry
+from .geo import KM_PER_DEGREE, BBox, bbox_around, geohash_cover
+
+
+def crop_growers(crop: str) -> Select:
+    """
+    Ids of farmers growing `crop` under any of its names ("paddy" finds
+    "Rice"), looked up by crop key in the farmer_crops index.
+    """
+    return select(FarmerCrop.farmer_id).where(
+        FarmerCrop.crop_key == crop_registry.resolve(crop)
+    )
+
+
+def crop_clause(crop: str):
+    return Farmer.id.in_(crop_growers(crop))
+
+
+def bbox_clause(bbox: BBox, dialect: str):
+    """
+    Farmers located inside `bbox`. On SQLite the farmer_locations R*Tree
+    finds the candidates; other backends take the geohash prefixes covering
+    the box as index range scans. Either way the coordinates are then
+    checked exactly.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    inside = and_(
+        Farmer.latitude.between(min_lat, max_lat),
+        Farmer.longitude.between(min_lon, max_lon),
+    )
+    if dialect == "sqlite":
+        loc = farmer_locations.c
+        candidates = select(loc.id).where(
+            loc.max_lat >= min_lat,
+            loc.min_lat <= max_lat,
+            loc.max_lon >= min_lon,
+            loc.min_lon <= max_lon,
+        )
+        return and_(Farmer.id.in_(candidates), inside)
+    cells = geohash_cover(bbox)
+    if cells == [""]:
+        return inside
+    # "{" sorts right after "z", the last geohash character
+    prefixes = or_(
+        *(and_(Farmer.geohash >= c, Farmer.geohash < c + "{") for c in cells)
+    )
+    return and_(prefixes, inside)
+
+
+def distance_sq_km(
+    lat_col: ColumnElement,
+    lon_col: ColumnElement,
+    lat: float,
+    lon: float,
+    cos_lat: float,
+) -> ColumnElement:
+    """
+    Squared flat-earth distance in km² of (lat_col, lon_col) from (lat,
+    lon), as a SQL expression, longitude degrees shortened by `cos_lat`.
+    At the radii /farmers/near serves it is within a percent of the
+    great-circle distance.
+    """
+    dy = (lat_col - lat) * KM_PER_DEGREE
+    dx = (lon_col - lon) * (KM_PER_DEGREE * cos_lat)
+    return dy * dy + dx * dx
+
+
+def near_query(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    dialect: str,
+    language: Optional[str] = None,
+    crop: Optional[str] = None,
+) -> Tuple[Select, ColumnElement, ColumnElement]:
+    """
+    (id, rank) of the farmers within about `radius_km` of (lat, lon), with
+    the rank and id expressions to order and keyset-paginate it by. Rank
+    is the squared flat-earth distance, so nearest first; the bound never
+    drops a farmer inside the radius but may keep a few just outside it,
+    for the caller to recheck. On SQLite candidates are bounded and ranked
+    inside the R*Tree, reading farmers rows only for a language filter.
+    """
+    box = bbox_around(lat, lon, radius_km)
+    if dialect == "sqlite":
+        loc = farmer_locations.c
+        id_col, lat_col, lon_col = loc.id, loc.min_lat, loc.min_lon
+        where = [
+            loc.max_lat >= box[0],
+            loc.min_lat <= box[2],
+            loc.max_lon >= box[1],
+            loc.min_lon <= box[3],
+        ]
+        if crop:
+            where.append(loc.id.in_(crop_growers(crop)))
+    else:
+        id_col, lat_col, lon_col = Farmer.id, Farmer.latitude, Farmer.longitude
+        where = [bbox_clause(box, dialect)]
+        if crop:
+            where.append(crop_clause(crop))
+    if language:
+        where.append(Farmer.language == language)
+
+    rank = distance_sq_km(lat_col, lon_col, lat, lon, math.cos(math.radians(lat)))
+    # longitude shortened as at the box's poleward edge, the bound is no
+    # more than any great-circle distance inside the box; the radius is
+    # widened by 1% for the flat earth and 10 m for the R*Tree's float32s
+    widest = max(abs(box[0]), abs(box[2]))
+    bound = distance_sq_km(lat_col, lon_col, lat, lon, math.cos(math.radians(widest)))
+    where.append(bound <= (radius_km * 1.01 + 0.01) ** 2)
+
+    stmt = select(id_col.label("id"), rank.label("rank"))
+    if dialect == "sqlite" and language:
+        stmt = stmt.join_from(farmer_locations, Farmer, Farmer.id == loc.id)
+    return stmt.where(*where), rank, id_col
+
+
+def filter_farmers(
+    stmt: Select,
+    language: Optional[str] = None,
+    crop: Optional[str] = None,
+    soil_type: Optional[str] = None,
+    irrigation_type: Optional[str] = None,
+) -> Select:
+    """AND the given profile filters onto a farmers query; None means any."""
+    if language:
+        stmt = stmt.where(Farmer.language == language)
+    if soil_type:
+        stmt = stmt.where(Farmer.soil_type == soil_type)
+    if irrigation_type:
+        stmt = stmt.where(Farmer.irrigation_type == irrigation_type)
+    if crop:
+        stmt = stmt.where(crop_clause(crop))
+    return stmt
@@ -0,0 +1,164 @@
+from collections import defaultdict
+from typing import AsyncIterable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.farmer import Farmer
+from ..models.farmer_crop import FarmerCrop
+from ..schemas.farmer import FarmerCreate
+from .advisory_batch import StageTimer
+from .bulk_io import BulkResult, read_records, validate_record, validation_message
+from .crops import crop_registry
+from .geo import geohash
+
+
+async def replace_farmer_crops(
+    db: AsyncSession, crops_by_farmer: Dict[int, Optional[str]]
+) -> None:
+    """
+    Rebuild the farmer_crops rows of farmers written in bulk (which bypasses
+    Farmer's ORM sync) from their crops strings: one DELETE and one
+    executemany INSERT, without committing.
+    """
+    if not crops_by_farmer:
+        return
+    await db.execute(
+        delete(FarmerCrop)
+        .where(FarmerCrop.farmer_id.in_(crops_by_farmer))
+        .execution_options(synchronize_session=False)
+    )
+    rows = [
+        {"farmer_id": farmer_id, "crop_key": key}
+        for farmer_id, crops in crops_by_farmer.items()
+        for key in crop_registry.parse(crops)
+    ]
+    if rows:
+        await db.execute(insert(FarmerCrop), rows)
+
+
+def _update_row(row: Dict, fields: Set[str], stored: Row) -> Dict:
+    """
+    UPDATE parameters for a stored farmer: only the columns the record
+    set (empty CSV cells and absent keys leave theirs alone), and the
+    geohash when either coordinate changes.
+    """
+    values = {k: row[k] for k in fields}
+    if "latitude" in fields or "longitude" in fields:
+        values["geohash"] = geohash(
+            values.get("latitude", stored.latitude),
+            values.get("longitude", stored.longitude),
+        )
+    values["id"] = stored.id
+    return values
+
+
+async def _upsert_chunk(
+    db: AsyncSession, chunk: List[Tuple[int, Dict, Set[str]]], result: BulkResult
+) -> None:
+    """
+    One transaction: farmers whose phone is already stored (one IN query for
+    the chunk) are updated by primary key, one executemany per set of
+    columns given, the rest go into one executemany INSERT, and the
+    farmer_crops rows of new farmers and of updates that set crops are
+    rebuilt. If a phone repeats within the chunk, its last row wins.
+    """
+    by_phone: Dict[str, Tuple[int, Dict, Set[str]]] = {}
+    inserts = []
+    for line, row, fields in chunk:
+        if row["phone"]:
+            by_phone[row["phone"]] = (line, row, fields)
+        else:
+            inserts.append(row)
+    stored = {
+        r.phone: r
+        for r in await db.execute(
+            select(Farmer.phone, Farmer.id, Farmer.latitude, Farmer.longitude).where(
+                Farmer.phone.in_(by_phone)
+            )
+        )
+    }
+    updates: Dict[FrozenSet[str], List[Dict]] = defaultdict(list)
+    crops_by_farmer: Dict[int, Optional[str]] = {}
+    for phone, (_, row, fields) in by_phone.items():
+        if phone in stored:
+            values = _update_row(row, fields, stored[phone])
+            updates[frozenset(values)].append(values)
+            if "crops" in fields:
+                crops_by_farmer[values["id"]] = row["crops"]
+        else:
+            inserts.append(row)
+    try:
+        if inserts:
+            # ids in parameter order, to key the new farmers' crop rows
+            ids = await db.scalars(
+                insert(Farmer).returning(Farmer.id, sort_by_parameter_order=True),
+                inserts,
+            )
+            crops_by_farmer.update(zip(ids, (row["crops"] for row in inserts)))
+        for rows in updates.values():
+            await db.execute(update(Farmer), rows)
+        await replace_farmer_crops(db, crops_by_farmer)
+        await db.commit()
+    except DBAPIError as e:
+        # the whole chunk rolls back; earlier chunks stay committed
+        await db.rollback()
+        message = f"import failed: {type(e.orig).__name__}: {e.orig}"
+        for line, _, _ in chunk:
+            result.fail(line, message)
+        return
+    result.inserted += len(inserts)
+    # superseded repeats of a phone count as updates of it
+    result.updated += len(chunk) - len(inserts)
+
+
+async def import_farmers(
+    db: AsyncSession,
+    body: AsyncIterable[bytes],
+    fmt: str,
+    chunk_size: int = 0,
+) -> Dict:
+    """
+    Insert or update the farmers in a CSV (with a header row) or NDJSON
+    stream of FarmerCreate records, matching existing farmers by phone.
+    An update only changes the columns its record gives.
+
+    Records are validated as they arrive, so the body is never held in
+    memory, and written `chunk_size` at a time, one transaction per chunk.
+    A bad record only fails its own line.
+    """
+    chunk_size = chunk_size or settings.FARMER_IMPORT_CHUNK
+    result = BulkResult(settings.FARMER_IMPORT_MAX_ERRORS)
+    timer = StageTimer()
+    chunk: List[Tuple[int, Dict, Set[str]]] = []
+    async for line, record in read_records(body, fmt):
+        result.received += 1
+        try:
+            farmer = validate_record(FarmerCreate, record)
+        except ValidationError as e:
+            result.fail(line, validation_message(e))
+            continue
+        row = farmer.model_dump()
+        row["phone"] = (row["phone"] or "").strip() or None
+        row["geohash"] = geohash(row["latitude"], row["longitude"])
+        chunk.append((line, row, farmer.model_fields_set))
+        if len(chunk) >= chunk_size:
+            timer.lap("parse")
+            await _upsert_chunk(db, chunk, result)
+            timer.lap("upsert")
+            chunk = []
+    timer.lap("parse")
+    if chunk:
+        await _upsert_chunk(db, chunk, result)
+        timer.lap("upsert")
+    return {
+        "received": result.received,
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "failed": result.failed,
+        "errors": result.sorted_errors(),
+        "timings_ms": timer.timings,
+    }
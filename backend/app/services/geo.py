@@ -0,0 +1,102 @@
+import math
+from typing import List, Optional, Tuple
+
+# (min_lat, min_lon, max_lat, max_lon), the order ADVISORY_JOBS bboxes use
+BBox = Tuple[float, float, float, float]
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# stored precision: 8 characters is a cell of about 38 m x 19 m
+GEOHASH_PRECISION = 8
+# a bbox is searched as at most this many geohash prefixes
+GEOHASH_COVER_MAX_CELLS = 32
+
+
+def geohash(
+    lat: Optional[float], lon: Optional[float], precision: int = GEOHASH_PRECISION
+) -> Optional[str]:
+    """Geohash of a coordinate, or None when either half is missing or NaN."""
+    if lat is None or lon is None or not (math.isfinite(lat) and math.isfinite(lon)):
+        return None
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # bits alternate between longitude and latitude, longitude first
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell of `precision` characters."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def _steps(low: float, high: float, step: float) -> List[float]:
+    # one point in every cell the span crosses, and the far edge
+    count = int((high - low) / step) + 1
+    return [low + i * step for i in range(count)] + [high]
+
+
+def geohash_cover(bbox: BBox, max_cells: int = GEOHASH_COVER_MAX_CELLS) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover `bbox`: the longest prefixes
+    that need no more than `max_cells` of them. [""] matches everything.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = (max_lat - min_lat) / height + 2
+        cols = (max_lon - min_lon) / width + 2
+        if rows * cols > 4 * max_cells:
+            continue  # far too many cells, no need to enumerate them
+        cells = {
+            geohash(lat, lon, precision)
+            for lat in _steps(min_lat, max_lat, height)
+            for lon in _steps(min_lon, max_lon, width)
+        }
+        if len(cells) <= max_cells:
+            return sorted(cells)
+    return [""]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> BBox:
+    """
+    Smallest lat/lon box holding the circle of `radius_km` around a point,
+    clamped to the map. Near the poles it widens to every longitude.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # the circle is widest in longitude at its edge nearest the pole
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest))
+    if widest >= 90.0 or radius_km / EARTH_RADIUS_KM >= cos_lat * math.pi / 2:
+        return (min_lat, -180.0, max_lat, 180.0)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return (min_lat, max(-180.0, lon - dlon), max_lat, min(180.0, lon + dlon))
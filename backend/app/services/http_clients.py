@@ -0,0 +1,132 @@
+import asyncio
+import importlib.util
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from ..config import settings
+
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to
+# HTTP/1.1 keep-alive when it is not installed.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class Upstream:
+    base_url: str = ""
+    timeout: float = 10.0
+    connect_timeout: Optional[float] = None
+    max_connections: int = 20
+    max_keepalive: int = 10
+    http2: bool = False
+
+
+def default_upstreams() -> Dict[str, Upstream]:
+    return {
+        "open_meteo": Upstream(
+            base_url="https://api.open-meteo.com",
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive=settings.HTTP_MAX_KEEPALIVE,
+            http2=True,
+        ),
+        # ipinfo.io / ipwho.is / ipapi.co share one small pool
+        "geo": Upstream(max_connections=10, max_keepalive=5, http2=True),
+        # Generation can take tens of seconds; connecting should not
+        "ollama": Upstream(
+            base_url=settings.OLLAMA_API_URL,
+            timeout=settings.OLLAMA_TIMEOUT_SECONDS,
+            connect_timeout=settings.OLLAMA_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive=settings.OLLAMA_MAX_CONNECTIONS,
+        ),
+    }
+
+
+class HTTPClientRegistry:
+    """
+    One pooled `httpx.AsyncClient` per upstream, shared by all requests.
+
+    Clients are created on `open()` (app startup) or lazily on first use,
+    and closed on `aclose()` (app shutdown). Connections are bound to the
+    event loop that opened them, so each loop (test clients, CLI runs) gets
+    its own pools, closed when that loop shuts down.
+    """
+
+    def __init__(self, upstreams: Dict[str, Upstream]):
+        self.upstreams = upstreams
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]
+        self._clients = {}
+        self._closers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def _build(self, upstream: Upstream) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=upstream.base_url,
+            timeout=httpx.Timeout(
+                upstream.timeout, connect=upstream.connect_timeout or upstream.timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=upstream.max_connections,
+                max_keepalive_connections=upstream.max_keepalive,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=upstream.http2 and HTTP2_AVAILABLE,
+        )
+
+    def open(self) -> None:
+        for name in self.upstreams:
+            self.get(name)
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        clients = self._clients.get(loop)
+        if clients is None:
+            self._forget_closed_loops()
+            clients = self._clients[loop] = {}
+            self._closers[loop] = loop.create_task(self._close_on_shutdown(loop))
+        client = clients.get(name)
+        if client is None:
+            client = self._build(self.upstreams[name])
+            clients[name] = client
+        return client
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Pending until aclose() or loop shutdown: asyncio.run (and anyio,
+        # under TestClient) cancels leftover tasks before closing the loop,
+        # which closes this loop's pools while it can still run.
+        try:
+            await loop.create_future()
+        finally:
+            await self._close_loop(loop)
+
+    async def _close_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._closers.pop(loop, None)
+        for client in self._clients.pop(loop, {}).values():
+            await client.aclose()
+
+    def _forget_closed_loops(self) -> None:
+        # A loop closed without cancelling its tasks never ran the closer;
+        # its sockets go with the dropped clients.
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            self._clients.pop(loop)
+            self._closers.pop(loop, None)
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        closer = self._closers.get(loop)
+        await self._close_loop(loop)
+        if closer is not None:
+            closer.cancel()
+
+
+http_clients = HTTPClientRegistry(default_upstreams())
+
+
+def get_http_client(name: str) -> Callable[[], Awaitable[httpx.AsyncClient]]:
+    """FastAPI dependency factory: `Depends(get_http_client("geo"))`."""
+
+    async def dependency() -> httpx.AsyncClient:
+        return http_clients.get(name)
+
+    return dependency
@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from ..config import settings
+
+
+# Lanes in priority order: a free slot always goes to the oldest interactive
+# waiter before any batch waiter.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+
+class QueueFull(Exception):
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"LLM {lane} queue is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class LaneStats:
+    def __init__(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_total = 0.0
+        self.service_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "queue_wait_ms_avg": _avg_ms(self.wait_total, self.admitted),
+            "queue_wait_ms_max": round(self.wait_max * 1000, 1),
+            "service_ms_avg": _avg_ms(self.service_total, self.completed),
+            "service_ms_max": round(self.service_max * 1000, 1),
+        }
+
+
+def _avg_ms(total: float, count: int) -> float:
+    return round(total / count * 1000, 1) if count else 0.0
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the local model.
+
+    At most `max_concurrency` generations run at once. Further callers wait in
+    a per-lane FIFO, and a freed slot is handed directly to the highest
+    priority waiter. When a lane already holds `queue_limits[lane]` waiters,
+    new callers are rejected with `QueueFull` carrying a Retry-After estimate
+    instead of piling up behind a model that cannot keep up.
+    """
+
+    def __init__(self, max_concurrency: int, queue_limits: Dict[str, int]):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self._active = 0
+        # [priority, seq, future, lane]; cancelled entries are skipped lazily
+        self._waiters: List[list] = []
+        self._depth = {lane: 0 for lane in LANES}
+        self._seq = itertools.count()
+        self._stats = {lane: LaneStats() for lane in LANES}
+
+    def retry_after(self, lane: str) -> int:
+        completed = sum(s.completed for s in self._stats.values())
+        service = sum(s.service_total for s in self._stats.values())
+        avg = service / completed if completed else 1.0
+        backlog = self._depth[lane] + self._active
+        return max(1, math.ceil(backlog * avg / self.max_concurrency))
+
+    async def acquire(self, lane: str) -> float:
+        stats = self._stats[lane]
+        queued_at = time.monotonic()
+        if self._active < self.max_concurrency:
+            self._active += 1
+        else:
+            if self._depth[lane] >= self.queue_limits[lane]:
+                stats.rejected += 1
+                raise QueueFull(lane, self.retry_after(lane))
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(
+                self._waiters, [LANES.index(lane), next(self._seq), fut, lane]
+            )
+            self._depth[lane] += 1
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.cancelled():
+                    self._depth[lane] -= 1
+                else:
+                    # the slot was handed over just as we were cancelled
+                    self._release_slot()
+                raise
+        started = time.monotonic()
+        waited = started - queued_at
+        stats.admitted += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+        return started
+
+    def release(self, lane: str, started: float) -> None:
+        stats = self._stats[lane]
+        took = time.monotonic() - started
+        stats.completed += 1
+        stats.service_total += took
+        stats.service_max = max(stats.service_max, took)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            _, _, fut, lane = heapq.heappop(self._waiters)
+            if fut.cancelled():
+                continue
+            self._depth[lane] -= 1
+            fut.set_result(None)  # hand the slot over; _active is unchanged
+            return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, lane: str) -> AsyncIterator[None]:
+        started = await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane, started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "lanes": {
+                lane: {
+                    "queued": self._depth[lane],
+                    "queue_limit": self.queue_limits[lane],
+                    **self._stats[lane].as_dict(),
+                }
+                for lane in LANES
+            },
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    queue_limits={
+        INTERACTIVE: settings.LLM_QUEUE_LIMIT_INTERACTIVE,
+        BATCH: settings.LLM_QUEUE_LIMIT_BATCH,
+    },
+)
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import operator
+import warnings
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .crops import CropRegistry, crop_registry
+
+
+RULES_DIR = Path(__file__).resolve().parents[2] / "kb" / "rules"
+
+# NaN-aware reductions over the day axis; an all-missing window yields NaN,
+# and NaN never satisfies a comparison, so missing data never fires a rule.
+AGGREGATIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "max": np.nanmax,
+    "min": np.nanmin,
+    "sum": np.nansum,
+    "mean": np.nanmean,
+}
+OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+}
+
+
+def _digest(value: Any) -> str:
+    blob = json.dumps(value, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One advisory rule. A rule fires when `aggregation` of daily `variable`
+    over days [window[0], window[1]) compares `op` `threshold` and, if
+    `crops` (canonical crop keys) is set, the farmer grows one of them.
+    Rules without a variable are crop-only. `text` may reference the
+    aggregated value as `{value}`.
+    """
+
+    id: str
+    text: str
+    severity: str = "info"
+    source: str = "rule"
+    variable: Optional[str] = None
+    window: Tuple[int, int] = (0, 1)
+    aggregation: str = "max"
+    op: str = ">="
+    threshold: Optional[float] = None
+    crops: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Rule":
+        data = dict(data)
+        if "window" in data:
+            data["window"] = tuple(data["window"])
+        if "crops" in data:
+            data["crops"] = tuple(data["crops"])
+        rule = cls(**data)
+        if rule.variable is not None:
+            if rule.aggregation not in AGGREGATIONS:
+                raise ValueError(f"{rule.id}: unknown aggregation {rule.aggregation!r}")
+            if rule.op not in OPS:
+                raise ValueError(f"{rule.id}: unknown operator {rule.op!r}")
+            if rule.threshold is None or not 0 <= rule.window[0] < rule.window[1]:
+                raise ValueError(f"{rule.id}: needs a threshold and a non-empty window")
+        return rule
+
+    @property
+    def feature(self) -> Tuple[str, Tuple[int, int], str]:
+        return (self.variable, self.window, self.aggregation)
+
+    def render(self, value: float = float("nan")) -> Dict[str, str]:
+        text = self.text.format(value=value) if "{" in self.text else self.text
+        return {"text": text, "severity": self.severity, "source": self.source}
+
+
+class RuleSet:
+    """
+    A compiled rule set, evaluated over a whole batch of farmers at once.
+
+    Compilation collects the distinct (variable, window, aggregation)
+    features the rules need, so each is reduced once per batch as a single
+    NumPy operation no matter how many rules share it. Evaluation builds a
+    NaN-padded (forecasts x days) matrix per variable, gathers rows per
+    farmer, and produces a (farmers x rules) boolean match matrix.
+
+    Crop rules are indexed by crop key, so a farmer's crop column is built
+    with one dict lookup per crop they grow rather than a scan of every
+    crop rule.
+    """
+
+    def __init__(self, rules: Sequence[Rule], fallback: Optional[Rule] = None):
+        self.rules = tuple(rules)
+        self.fallback = fallback
+        self.features = sorted({r.feature for r in self.rules if r.variable})
+        self.variables = sorted({f[0] for f in self.features})
+        self.horizon = max((f[1][1] for f in self.features), default=0)
+        self.crop_free = np.array([not r.crops for r in self.rules], dtype=bool)
+        self.crop_index: Dict[str, List[int]] = {}
+        for j, rule in enumerate(self.rules):
+            for key in rule.crops:
+                self.crop_index.setdefault(key, []).append(j)
+        # changes whenever any rule (or the fallback) changes
+        self.version = _digest([self.rules, self.fallback])
+
+    @classmethod
+    def from_file(cls, path: Path, registry: CropRegistry = crop_registry) -> "RuleSet":
+        """
+        Rules from a kb/rules JSON file followed by every crop's rules from
+        `registry`; crop names in the file are resolved to canonical keys.
+        """
+        data = json.loads(path.read_text(encoding="utf-8"))
+        rules = []
+        for r in data["rules"]:
+            rule = Rule.from_dict(r)
+            crops = tuple(registry.resolve(c) for c in rule.crops)
+            rules.append(replace(rule, crops=crops))
+        for crop in registry:
+            rules.extend(Rule.from_dict({**r, "crops": [crop.key]}) for r in crop.rules)
+        fallback = data.get("fallback")
+        return cls(rules, Rule.from_dict(fallback) if fallback else None)
+
+    def forecast_fingerprint(self, forecast: Dict) -> str:
+        """
+        Digest of the part of `forecast` the rules read: their variables
+        over the horizon, plus the dates, since windows are relative to
+        day 0. Forecast updates outside that slice leave it unchanged.
+        """
+        daily = forecast.get("daily") or {}
+        return _digest(
+            {v: (daily.get(v) or [])[: self.horizon] for v in ["time", *self.variables]}
+        )
+
+    def profile_fingerprint(self, crop_keys: Iterable[str]) -> str:
+        """Digest of the rule set version and the farmer inputs it reads."""
+        return _digest([self.version, sorted(crop_keys)])
+
+    def _daily_matrix(self, forecasts: Sequence[Dict], variable: str) -> np.ndarray:
+        matrix = np.full((len(forecasts), self.horizon), np.nan)
+        for i, forecast in enumerate(forecasts):
+            values = (forecast.get("daily") or {}).get(variable) or []
+            values = values[: self.horizon]
+            matrix[i, : len(values)] = [np.nan if v is None else v for v in values]
+        return matrix
+
+    def _features(self, forecasts: Sequence[Dict]) -> Dict[tuple, np.ndarray]:
+        data = {v: self._daily_matrix(forecasts, v) for v in self.variables}
+        features = {}
+        with warnings.catch_warnings():
+            # all-NaN windows: "All-NaN slice encountered" / "Mean of empty slice"
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for feature in self.features:
+                variable, (start, end), aggregation = feature
+                features[feature] = AGGREGATIONS[aggregation](
+                    data[variable][:, start:end], axis=1
+                )
+        return features
+
+    def evaluate(
+        self,
+        forecasts: Sequence[Dict],
+        crops: Sequence[Iterable[str]],
+        forecast_index: Optional[Sequence[int]] = None,
+    ) -> List[List[Dict[str, str]]]:
+        """
+        Advisories for each farmer. `crops[i]` holds farmer i's canonical
+        crop keys (see CropRegistry.parse); `forecast_index[i]` picks farmer
+        i's row in `forecasts` (defaults to one forecast per farmer), so
+        farmers sharing a grid cell share one forecast and the per-cell
+        reduction is done once.
+        """
+        n = len(crops)
+        index = np.arange(n) if forecast_index is None else forecast_index
+        index = np.asarray(index, dtype=np.intp)
+        features = {k: v[index] for k, v in self._features(forecasts).items()}
+
+        matches = np.tile(self.crop_free, (n, 1))
+        for i, keys in enumerate(crops):
+            for key in keys:
+                columns = self.crop_index.get(key)
+                if columns:
+                    matches[i, columns] = True
+        with np.errstate(invalid="ignore"):
+            for j, rule in enumerate(self.rules):
+                if rule.variable:
+                    matches[:, j] &= OPS[rule.op](
+                        features[rule.feature], rule.threshold
+                    )
+
+        out = []
+        for i in range(n):
+            advs = [
+                rule.render(features[rule.feature][i] if rule.variable else np.nan)
+                for rule, hit in zip(self.rules, matches[i])
+                if hit
+            ]
+            if not advs and self.fallback is not None:
+                advs.append(self.fallback.render())
+            out.append(advs)
+        return out
+
+
+default_ruleset = RuleSet.from_file(RULES_DIR / "weather.json")
+
+
+def evaluate_chunk(
+    forecasts: Sequence[Dict],
+    crops: Sequence[Iterable[str]],
+    forecast_index: Sequence[int],
+) -> List[List[Dict[str, str]]]:
+    """`default_ruleset.evaluate` as a picklable entry point for process pools."""
+    return default_ruleset.evaluate(forecasts, crops, forecast_index)
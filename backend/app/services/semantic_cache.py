@@ -0,0 +1,176 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from ..models.farmer import Farmer
+from .weather import Cell, grid_cell
+
+
+def embed_question(text: str) -> np.ndarray:
+    """
+    Unit-length embedding of a question with the KB embedder. CPU-bound:
+    call it through a threadpool from async code.
+    """
+    # imported lazily: loading fastembed/onnxruntime is slow and only the
+    # chat path needs it
+    from .embeddings import get_embedder
+
+    vector = np.asarray(next(iter(get_embedder().embed([text]))), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def region_cell(farmer: Farmer) -> Optional[Cell]:
+    """
+    Forecast grid cell of the farmer's location, the only place a shared
+    answer may refer to; None when the location is unknown.
+    """
+    lat, lon = farmer.latitude, farmer.longitude
+    if lat is None or lon is None or not (math.isfinite(lat) and math.isfinite(lon)):
+        return None
+    return grid_cell(lat, lon)
+
+
+def profile_bucket(farmer: Farmer) -> str:
+    """
+    Farmers whose answers are interchangeable: same language, crops (by
+    canonical key, so "Paddy" and "rice" agree), soil, irrigation and
+    forecast grid cell. Answers are never shared across buckets, and are
+    generated from these fields alone (no name, id or exact location).
+    """
+    cell = region_cell(farmer)
+    return "|".join(
+        [
+            (farmer.language or "").lower(),
+            ",".join(sorted(farmer.crop_keys)),
+            (farmer.soil_type or "").lower(),
+            (farmer.irrigation_type or "").lower(),
+            f"{cell[0]},{cell[1]}" if cell else "",
+        ]
+    )
+
+
+class _Bucket:
+    """Fixed-size ring of (unit vector, answer, expiry) for one profile bucket."""
+
+    def __init__(self, capacity: int, dim: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.zeros(capacity, dtype=np.float64)
+        self.answers: List[Optional[str]] = [None] * capacity
+        self.size = 0
+        self.next = 0
+        # expiry of the newest entry: once past, the whole bucket is dead
+        self.expires_at = 0.0
+
+
+class SemanticAnswerCache:
+    """
+    Near-duplicate question cache for /ai/chat.
+
+    A question hits when the cosine similarity between its embedding and a
+    stored, unexpired question in the same profile bucket is at least
+    `threshold`. Each bucket is a fixed-size ring, so lookup is one
+    matrix-vector product and the oldest answers are overwritten first.
+    At most `max_buckets` buckets are kept: fully expired buckets are
+    dropped first, then the least recently used ones.
+    """
+
+    # seconds between sweeps for fully expired buckets
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        threshold: float,
+        max_per_bucket: int,
+        ttl_seconds: int,
+        max_buckets: int = 256,
+    ):
+        self.threshold = threshold
+        self.max_per_bucket = max_per_bucket
+        self.ttl_seconds = ttl_seconds
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._next_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bucket_evictions = 0
+        self.buckets_expired = 0
+        self.errors = 0
+
+    def lookup(self, bucket: str, vector: np.ndarray) -> Optional[str]:
+        b = self._buckets.get(bucket)
+        if b is not None and b.size:
+            self._buckets.move_to_end(bucket)
+            scores = b.vectors[: b.size] @ vector
+            scores[b.expires[: b.size] <= time.time()] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self.hits += 1
+                return b.answers[best]
+        self.misses += 1
+        return None
+
+    def store(self, bucket: str, vector: np.ndarray, answer: str) -> None:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._drop_expired(now)
+        b = self._buckets.get(bucket)
+        if b is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._drop_expired(now)
+            while len(self._buckets) >= self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.bucket_evictions += 1
+            b = self._buckets[bucket] = _Bucket(self.max_per_bucket, vector.shape[0])
+        else:
+            self._buckets.move_to_end(bucket)
+        if b.size == self.max_per_bucket:
+            self.evictions += 1
+        else:
+            b.size += 1
+        b.vectors[b.next] = vector
+        b.expires[b.next] = b.expires_at = now + self.ttl_seconds
+        b.answers[b.next] = answer
+        b.next = (b.next + 1) % self.max_per_bucket
+        self.stores += 1
+
+    def _drop_expired(self, now: float) -> None:
+        expired = [key for key, b in self._buckets.items() if b.expires_at <= now]
+        for key in expired:
+            del self._buckets[key]
+        self.buckets_expired += len(expired)
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.AI_SEMANTIC_CACHE_ENABLED,
+            "threshold": self.threshold,
+            "buckets": len(self._buckets),
+            "entries": sum(b.size for b in self._buckets.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bucket_evictions": self.bucket_evictions,
+            "buckets_expired": self.buckets_expired,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+semantic_cache = SemanticAnswerCache(
+    threshold=settings.AI_SEMANTIC_CACHE_THRESHOLD,
+    max_per_bucket=settings.AI_SEMANTIC_CACHE_MAX_PER_BUCKET,
+    ttl_seconds=settings.AI_SEMANTIC_CACHE_TTL_SECONDS,
+    max_buckets=settings.AI_SEMANTIC_CACHE_MAX_BUCKETS,
+)
@@ -1,17 +1,180 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
 import httpx
-from typing import Any, Dict
 
+from ..config import settings
+from .http_clients import http_clients
+
+
+# (lat index, lon index) of a WEATHER_GRID_DEG-sized cell
+Cell = Tuple[int, int]
+
+
+def grid_cell(lat: float, lon: float, step: Optional[float] = None) -> Cell:
+    """Snap a coordinate to the grid cell that contains it."""
+    step = step or settings.WEATHER_GRID_DEG
+    # round before flooring so 0.15 / 0.05 lands in cell 3, not 2.999...
+    return (math.floor(round(lat / step, 9)), math.floor(round(lon / step, 9)))
+
+
+def cell_center(cell: Cell, step: Optional[float] = None) -> Tuple[float, float]:
+    step = step or settings.WEATHER_GRID_DEG
+    return (round((cell[0] + 0.5) * step, 4), round((cell[1] + 0.5) * step, 4))
+
+
+class ForecastCache:
+    """
+    Bounded LRU cache of forecasts keyed on grid cell.
+
+    Entries expire at the next TTL boundary of wall-clock time rather than
+    TTL seconds after insertion, so every cell rolls over together right
+    after the upstream model refresh instead of serving a stale run for up
+    to another full TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Cell, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expiry(self, now: float) -> float:
+        return (math.floor(now / self.ttl_seconds) + 1) * self.ttl_seconds
+
+    def get(self, cell: Cell) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(cell)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, forecast = entry
+        if expires_at <= time.time():
+            del self._entries[cell]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(cell)
+        self.hits += 1
+        return forecast
+
+    def put(self, cell: Cell, forecast: Dict[str, Any]) -> None:
+        self._entries[cell] = (self._expiry(time.time()), forecast)
+        self._entries.move_to_end(cell)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
 
-async def get_forecast(lat: float, lon: float) -> Dict[str, Any]:
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "grid_deg": settings.WEATHER_GRID_DEG,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+forecast_cache = ForecastCache(
+    max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.WEATHER_CACHE_TTL_SECONDS,
+)
+
+
+async def _fetch_forecast(
+    client: httpx.AsyncClient, lat: float, lon: float
+) -> Dict[str, Any]:
     # Open-Meteo free API, no key needed
-    url = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}"
-        "&hourly=temperature_2m,precipitation_probability"
-        "&daily=temperature_2m_max,temperature_2m_min,precipitation_sum"
-        "&timezone=auto"
+    r = await client.get(
+        "/v1/forecast",
+        params={
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": "temperature_2m,precipitation_probability",
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+            "timezone": "auto",
+        },
     )
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        return r.json()
+    r.raise_for_status()
+    return r.json()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent lookups for the same cell onto one upstream fetch.
+
+    The first caller for a cell starts the fetch as a task; callers arriving
+    while it is in flight await the same task. The task is shielded so a
+    cancelled (disconnected) caller does not abort the fetch for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Cell, "asyncio.Task[Dict[str, Any]]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, cell: Cell, client: httpx.AsyncClient) -> Dict[str, Any]:
+        task = self._inflight.get(cell)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._fetch(cell, client))
+            self._inflight[cell] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, cell: Cell, client: httpx.AsyncClient) -> Dict[str, Any]:
+        try:
+            forecast = await _fetch_forecast(client, *cell_center(cell))
+            forecast_cache.put(cell, forecast)
+            return forecast
+        finally:
+            self._inflight.pop(cell, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+forecast_flight = SingleFlight()
+
+
+async def get_forecast(
+    lat: float, lon: float, client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, Any]:
+    """
+    Forecast for the grid cell containing (lat, lon).
+
+    Every farmer in a cell shares one upstream request: the forecast is
+    fetched for the cell centre and served from `forecast_cache` until the
+    next model refresh, and concurrent misses for a cell wait on the same
+    in-flight fetch. `client` defaults to the shared Open-Meteo pool.
+    """
+    cell = grid_cell(lat, lon)
+    forecast = forecast_cache.get(cell)
+    if forecast is None:
+        forecast = await forecast_flight.do(
+            cell, client or http_clients.get("open_meteo")
+        )
+    return forecast
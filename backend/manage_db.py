@@ -95,6 +95,116 @@ def inspect_database():
         print(f"❌ Error inspecting database: {e}")
 
 
+def advise_batch(args):
+    """Generate rule advisories for many farmers, one forecast fetch per grid cell"""
+    import asyncio
+
+    from app.db import AsyncSessionLocal
+    from app.schemas.advisory import AdvisoryBatchRequest
+    from app.services.advisory_batch import run_batch
+    from app.services.http_clients import http_clients
+
+    filters = AdvisoryBatchRequest(
+        farmer_ids=args.farmer_ids,
+        language=args.language,
+        crop=args.crop,
+        limit=args.limit,
+        force_refresh=args.force_refresh,
+    )
+
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await run_batch(db, filters)
+        finally:
+            await http_clients.aclose()
+
+    print("🌦️  Generating advisories...")
+    result = asyncio.run(run())
+    print(
+        f"✅ {result['advisories']} advisories for {result['farmers']} farmers "
+        f"across {result['cells']} forecast cells"
+    )
+    if result["unchanged_farmers"]:
+        print(f"⏭️  {result['unchanged_farmers']} farmers unchanged since last run")
+    if result["skipped_farmers"] or result["failed_cells"]:
+        print(
+            f"⚠️  Skipped {result['skipped_farmers']} farmers "
+            f"({result['failed_cells']} forecast cells failed)"
+        )
+    for stage, ms in result["timings_ms"].items():
+        print(f"  {stage}: {ms} ms")
+
+
+def import_farmers(args):
+    """Load farmers from a CSV or NDJSON file, updating those whose phone exists"""
+    import asyncio
+
+    from app.db import AsyncSessionLocal
+    from app.services.farmer_import import import_farmers as run_import
+
+    path = Path(args.path)
+    fmt = args.format or {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(
+        path.suffix.lower()
+    )
+    if fmt is None:
+        print(f"❌ Cannot tell the format of {path}; pass --format csv|ndjson")
+        return
+
+    async def chunks():
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                yield chunk
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await run_import(db, chunks(), fmt)
+
+    print(f"📥 Importing farmers from {path}...")
+    result = asyncio.run(run())
+    print(
+        f"✅ {result['inserted']} farmers added, {result['updated']} updated "
+        f"from {result['received']} rows"
+    )
+    if result["failed"]:
+        print(f"⚠️  {result['failed']} rows failed:")
+        for error in result["errors"]:
+            print(f"  line {error['line']}: {error['error']}")
+    for stage, ms in result["timings_ms"].items():
+        print(f"  {stage}: {ms} ms")
+
+
+def export_table(args):
+    """Write a whole table to a CSV or NDJSON file (gzipped if it ends in .gz)"""
+    import asyncio
+
+    from app.services.export import export_table as stream_table
+
+    path = Path(args.path)
+    suffixes = [s.lower() for s in path.suffixes]
+    compress = args.gzip or suffixes[-1:] == [".gz"]
+    if compress and suffixes[-1:] == [".gz"]:
+        suffixes = suffixes[:-1]
+    fmt = args.format or {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(
+        suffixes[-1] if suffixes else ""
+    )
+    if fmt is None:
+        print(f"❌ Cannot tell the format of {path}; pass --format csv|ndjson")
+        return
+
+    async def run():
+        written = 0
+        with open(path, "wb") as f:
+            async for chunk in stream_table(args.table, fmt, compress):
+                f.write(chunk)
+                written += len(chunk)
+        return written
+
+    print(f"📤 Exporting {args.table} to {path}...")
+    written = asyncio.run(run())
+    print(f"✅ Wrote {written / 1e6:.1f} MB")
+
+
 def show_help():
     """Show help information"""
     print("🚀 Krishi Sakhi Database Management")
@@ -102,10 +212,16 @@ def show_help():
     print("Available commands:")
     print("  reset     - Remove database and recreate tables")
     print("  inspect   - Show database schema and data")
+    print("  advise-batch - Generate rule advisories for many farmers")
+    print("  import    - Add or update farmers from a CSV/NDJSON file")
+    print("  export    - Write farmers/activities/advisories to a CSV/NDJSON file")
     print("  help      - Show this help message")
     print("\nUsage examples:")
     print("  python manage_db.py reset")
     print("  python manage_db.py inspect")
+    print("  python manage_db.py advise-batch --crop banana --language ml")
+    print("  python manage_db.py import farmers.csv")
+    print("  python manage_db.py export activities.ndjson.gz --table activities")
     print("\nQuick reset (Windows):")
     print("  manage_db.bat reset")
 
@@ -113,7 +229,37 @@ def show_help():
 def main():
     parser = argparse.ArgumentParser(description="Database management for Krishi Sakhi")
     parser.add_argument(
-        "command", choices=["reset", "inspect", "help"], help="Command to execute"
+        "command",
+        choices=["reset", "inspect", "advise-batch", "import", "export", "help"],
+        help="Command to execute",
+    )
+    parser.add_argument(
+        "path", nargs="?", help="import/export: CSV or NDJSON file (.gz for export)"
+    )
+    batch = parser.add_argument_group("advise-batch filters")
+    batch.add_argument("--farmer-ids", type=int, nargs="+", help="Only these farmers")
+    batch.add_argument("--language", help="Only farmers with this language code")
+    batch.add_argument("--crop", help="Only farmers growing this crop")
+    batch.add_argument("--limit", type=int, help="At most this many farmers")
+    batch.add_argument(
+        "--force-refresh",
+        action="store_true",
+        help="Recompute farmers whose forecast and profile are unchanged",
+    )
+    load = parser.add_argument_group("import/export options")
+    load.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        help="File format (default: from the .csv/.ndjson/.jsonl extension)",
+    )
+    load.add_argument(
+        "--table",
+        choices=["farmers", "farmer_crops", "activities", "advisories"],
+        default="farmers",
+        help="export: table to write (default: farmers)",
+    )
+    load.add_argument(
+        "--gzip", action="store_true", help="export: gzip the output (or use .gz)"
     )
 
     args = parser.parse_args()
@@ -122,6 +268,16 @@ def main():
         reset_database()
     elif args.command == "inspect":
         inspect_database()
+    elif args.command == "advise-batch":
+        advise_batch(args)
+    elif args.command == "import":
+        if not args.path:
+            parser.error("import needs a file path")
+        import_farmers(args)
+    elif args.command == "export":
+        if not args.path:
+            parser.error("export needs a file path")
+        export_table(args)
     elif args.command == "help":
         show_help()
 
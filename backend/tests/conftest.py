@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite file before app.config is imported, so
+# test runs never write into the checked-in krishisakhi.db.
+_db_dir = tempfile.mkdtemp(prefix="krishisakhi-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+# Chat tests must not download the embedding model; semantic cache tests
+# enable it explicitly with a stub embedder.
+os.environ.setdefault("AI_SEMANTIC_CACHE_ENABLED", "false")
+# Scheduled runs are tested by calling the job directly.
+os.environ.setdefault("ADVISORY_SCHEDULER_ENABLED", "false")
+
+from app.db import engine  # noqa: E402
+from app.models import Base  # noqa: E402
+
+Base.metadata.create_all(bind=engine)
@@ -29,3 +29,198 @@ def test_advisory_invalid_coords():
     # either 422 or 503 depending on service state (or 200 if backend tolerates NaN)
     assert resp.status_code in (422, 503, 200)
 
+
+
+def _farmer(**extra):
+    payload = {"name": "Adv", "language": "en", "latitude": 10.0, "longitude": 76.3}
+    payload.update(extra)
+    r = client.post("/farmers/", json=payload)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def test_advisories_persisted_in_one_insert(monkeypatch):
+    from sqlalchemy import event
+
+    from app.db import async_write_engine
+    from app.routers import advisories
+
+    async def fake_forecast(lat, lon, client=None):
+        return {
+            "daily": {
+                "precipitation_sum": [0, 12, 0],
+                "temperature_2m_max": [36, 34, 33],
+                "temperature_2m_min": [22, 23, 22],
+            }
+        }
+
+    monkeypatch.setattr(advisories, "get_forecast", fake_forecast)
+    fid = _farmer(crops="banana")
+
+    inserts = []
+
+    def count(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO ADVISORIES "):
+            inserts.append(statement)
+
+    event.listen(async_write_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        r = client.get(f"/advisories/for/{fid}")
+    finally:
+        event.remove(async_write_engine.sync_engine, "before_cursor_execute", count)
+
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert len(body) == 3
+    assert all(a["id"] and a["created_at"] and a["farmer_id"] == fid for a in body)
+    assert len(inserts) == 1
+
+
+def test_batch_fetches_each_cell_once(monkeypatch):
+    from app.services import weather
+
+    fetched = []
+
+    async def fake_fetch(client, lat, lon):
+        fetched.append((lat, lon))
+        return {"daily": {"precipitation_sum": [0, 8], "temperature_2m_max": [30]}}
+
+    monkeypatch.setattr(weather, "_fetch_forecast", fake_fetch)
+    weather.forecast_cache.clear()
+
+    ids = [
+        _farmer(latitude=10.011, longitude=76.301),
+        _farmer(latitude=10.012, longitude=76.302, crops="Banana"),
+        _farmer(latitude=10.013, longitude=76.303),
+        _farmer(latitude=11.5, longitude=76.0),
+    ]
+    r = client.post("/advisories/batch", json={"farmer_ids": ids})
+    weather.forecast_cache.clear()
+
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert result["farmers"] == 4
+    assert result["cells"] == 2
+    assert len(fetched) == 2
+    # one rain warning each, plus the banana note for the second farmer
+    assert result["advisories"] == 5
+    assert set(result["timings_ms"]) == {
+        "load_farmers",
+        "fetch_forecasts",
+        "evaluate_rules",
+        "persist",
+    }
+
+    # a rerun the same day produces the same advisories and writes none
+    r = client.post("/advisories/batch", json={"farmer_ids": ids})
+    weather.forecast_cache.clear()
+    assert r.json()["advisories"] == 0
+    assert r.json()["unchanged_farmers"] == 4
+
+
+def test_polling_returns_stored_rows_and_regeneration_dedups(monkeypatch):
+    from app.routers import advisories
+
+    calls = []
+
+    async def fake_forecast(lat, lon, client=None):
+        calls.append((lat, lon))
+        return {"daily": {"precipitation_sum": [0, 12]}}
+
+    monkeypatch.setattr(advisories, "get_forecast", fake_forecast)
+    fid = _farmer()
+
+    first = client.get(f"/advisories/for/{fid}").json()
+    again = client.get(f"/advisories/for/{fid}").json()
+    assert again == first
+    assert len(calls) == 1
+
+    refreshed = client.get(f"/advisories/for/{fid}?force_refresh=true").json()
+    assert len(calls) == 2
+    assert [a["id"] for a in refreshed] == [a["id"] for a in first]
+
+
+def set_crops(farmer_id, crops):
+    from app.db import SessionLocal
+    from app.models.farmer import Farmer
+
+    with SessionLocal() as db:
+        db.get(Farmer, farmer_id).crops = crops
+        db.commit()
+
+
+def test_rules_skipped_while_forecast_and_profile_unchanged(monkeypatch):
+    from app.config import settings
+    from app.routers import advisories
+
+    forecast = {"daily": {"time": ["d0", "d1"], "precipitation_sum": [0, 12]}}
+
+    async def fake_forecast(lat, lon, client=None):
+        return forecast
+
+    evaluated = []
+
+    def counting_build(farmer, weather):
+        evaluated.append(farmer)
+        return build_advisories(farmer, weather)
+
+    build_advisories = advisories.build_advisories
+    monkeypatch.setattr(advisories, "get_forecast", fake_forecast)
+    monkeypatch.setattr(advisories, "build_advisories", counting_build)
+    monkeypatch.setattr(settings, "ADVISORY_REGENERATE_WINDOW_SECONDS", 0)
+    fid = _farmer(crops="Paddy")
+
+    first = client.get(f"/advisories/for/{fid}").json()
+    # "rice" is the same profile as "Paddy"
+    set_crops(fid, "rice")
+    again = client.get(f"/advisories/for/{fid}").json()
+    assert again == first
+    assert len(evaluated) == 1
+
+    set_crops(fid, "banana")
+    assert len(client.get(f"/advisories/for/{fid}").json()) == 2
+    forecast = {"daily": {"time": ["d1", "d2"], "precipitation_sum": [12, 0]}}
+    assert len(client.get(f"/advisories/for/{fid}").json()) == 1
+    assert len(evaluated) == 3
+
+
+def test_feed_is_keyset_paginated_and_filtered():
+    from datetime import date, datetime, timedelta
+
+    from app.db import SessionLocal
+    from app.models.advisory import Advisory
+
+    fid = _farmer()
+    base = datetime(2026, 1, 1, 6, 0, 0)
+    with SessionLocal() as db:
+        db.add_all(
+            Advisory(
+                farmer_id=fid,
+                text=f"Advisory {i}",
+                severity="warn" if i % 2 else "info",
+                source="rule",
+                # pairs share a timestamp, so the id tie-breaker matters
+                created_at=base + timedelta(days=i // 2),
+                day=date(2026, 1, 1) + timedelta(days=i),
+            )
+            for i in range(7)
+        )
+        db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"/advisories/by-farmer/{fid}", params=params)
+        assert r.status_code == 200, r.text
+        seen.extend(a["text"] for a in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [f"Advisory {i}" for i in range(6, -1, -1)]
+
+    r = client.get(f"/advisories/by-farmer/{fid}", params={"severity": "warn"})
+    assert [a["text"] for a in r.json()] == ["Advisory 5", "Advisory 3", "Advisory 1"]
+    assert "X-Next-Cursor" not in r.headers
+
+    assert client.get(f"/advisories/by-farmer/{fid}?cursor=bogus").status_code == 400
+    assert client.get(f"/advisories/by-farmer/{fid}?limit=0").status_code == 422
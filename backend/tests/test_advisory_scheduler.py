@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import weather
+from app.services.advisory_scheduler import AdvisoryScheduler, JobSpec, job_specs
+
+client = TestClient(app)
+
+
+def test_job_specs_parse_and_validate():
+    spec = JobSpec.from_dict({"name": "wayanad", "time": "05:00", "bbox": [1, 2, 3, 4]})
+    assert (spec.hour, spec.minute, spec.bbox) == (5, 0, (1, 2, 3, 4))
+    with pytest.raises(ValueError):
+        JobSpec.from_dict({"name": "x", "time": "25:00"})
+    with pytest.raises(ValueError):
+        job_specs([{"name": "x", "time": "5:00"}, {"name": "x", "time": "6:00"}])
+
+
+def test_one_worker_runs_the_job_and_endpoint_reads_it(monkeypatch):
+    fetched = []
+
+    async def fake_fetch(client, lat, lon):
+        fetched.append((lat, lon))
+        return {"daily": {"time": ["d0", "d1"], "precipitation_sum": [0, 20]}}
+
+    monkeypatch.setattr(weather, "_fetch_forecast", fake_fetch)
+    weather.forecast_cache.clear()
+    r = client.post(
+        "/farmers/",
+        json={"name": "Sched", "latitude": 8.51, "longitude": 77.01, "crops": "banana"},
+    )
+    fid = r.json()["id"]
+
+    spec = JobSpec(
+        name="test-district", hour=5, minute=0, bbox=(8.5, 77.0, 8.52, 77.02)
+    )
+    workers = [AdvisoryScheduler(), AdvisoryScheduler()]
+    monkeypatch.setattr(settings, "ADVISORY_JOB_WORKERS", 2)
+    # the scheduler's own pool, which starts workers without forking
+    assert workers[0].executor._mp_context.get_start_method() != "fork"
+
+    async def run_both():
+        with workers[0].executor as pool:
+            return await asyncio.gather(
+                *(w.run_job(spec, executor=pool) for w in workers)
+            )
+
+    results = asyncio.run(run_both())
+    weather.forecast_cache.clear()
+    ran = [r for r in results if r is not None]
+    assert len(ran) == 1
+    assert ran[0]["farmers"] == 1 and ran[0]["advisories"] == 2
+    assert sum(w.jobs[spec.name].skipped for w in workers) == 1
+    assert len(fetched) == 1
+
+    jobs = {j["name"]: j for j in client.get("/advisories/jobs").json()}
+    job = jobs["test-district"]
+    assert job["status"] == "succeeded"
+    assert (job["runs"], job["failures"]) == (1, 0)
+    assert job["last_result"]["advisories"] == 2
+
+    # materialized: the endpoint serves the run without fetching again
+    monkeypatch.setattr(settings, "ADVISORY_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(settings, "ADVISORY_REGENERATE_WINDOW_SECONDS", 0)
+    body = client.get(f"/advisories/for/{fid}").json()
+    assert len(body) == 2
+    assert len(fetched) == 1
+
+
+def test_failed_run_is_counted_and_lease_expiry_allows_rerun(monkeypatch):
+    async def broken_batch(*args, **kwargs):
+        raise RuntimeError("db gone")
+
+    from app.services import advisory_scheduler
+
+    monkeypatch.setattr(advisory_scheduler, "run_batch", broken_batch)
+    monkeypatch.setattr(settings, "ADVISORY_JOB_LEASE_SECONDS", 0)
+    worker = AdvisoryScheduler()
+    spec = JobSpec(name="test-failing", hour=5, minute=0)
+
+    assert asyncio.run(worker.run_job(spec, executor=object())) is None
+    assert asyncio.run(worker.run_job(spec, executor=object())) is None
+
+    progress = worker.jobs[spec.name]
+    assert (progress.runs, progress.failures, progress.state) == (2, 2, "failed")
+    job = {j["name"]: j for j in client.get("/advisories/jobs").json()}[spec.name]
+    assert job["failures"] == 2
+    assert job["last_error"] == "RuntimeError: db gone"
+
+
+def test_scheduler_on_serves_only_todays_scheduled_run_for_the_forecast(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+
+    from sqlalchemy import update
+
+    from app.db import SessionLocal
+    from app.models import AdvisoryRun
+
+    rain = {"daily": {"time": ["d0", "d1"], "precipitation_sum": [0, 20]}}
+    dry = {"daily": {"time": ["d0", "d1"], "precipitation_sum": [0, 0]}}
+    upstream = {"forecast": rain}
+    fetched = []
+
+    async def fake_fetch(client, lat, lon):
+        fetched.append((lat, lon))
+        return upstream["forecast"]
+
+    monkeypatch.setattr(weather, "_fetch_forecast", fake_fetch)
+    monkeypatch.setattr(settings, "ADVISORY_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(settings, "ADVISORY_REGENERATE_WINDOW_SECONDS", 0)
+    weather.forecast_cache.clear()
+    fid = client.post(
+        "/farmers/",
+        json={"name": "Fresh", "latitude": 9.31, "longitude": 76.61, "crops": "rice"},
+    ).json()["id"]
+
+    def texts():
+        return {a["text"] for a in client.get(f"/advisories/for/{fid}").json()}
+
+    # an on-demand run is not materialized: a changed forecast is picked up
+    rainy = texts()
+    upstream["forecast"] = dry
+    weather.forecast_cache.clear()
+    assert texts() != rainy
+
+    # a scheduled run is served as-is, without a fetch
+    upstream["forecast"] = rain
+    weather.forecast_cache.clear()
+    spec = JobSpec(name="test-fresh", hour=5, minute=0, bbox=(9.3, 76.6, 9.32, 76.62))
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert asyncio.run(AdvisoryScheduler().run_job(spec, executor=pool))
+    weather.forecast_cache.clear()
+    fetched.clear()
+    assert texts() == rainy and not fetched
+
+    # ...unless this worker holds a newer forecast for the cell
+    weather.forecast_cache.put(weather.grid_cell(9.31, 76.61), dry)
+    assert texts() != rainy
+
+    # ...or the run is from an earlier day
+    upstream["forecast"] = rain
+    weather.forecast_cache.clear()
+    spec = JobSpec(name="test-fresh-2", hour=5, minute=0, bbox=spec.bbox)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert asyncio.run(AdvisoryScheduler().run_job(spec, executor=pool))
+    assert texts() == rainy
+    with SessionLocal() as db:
+        db.execute(
+            update(AdvisoryRun)
+            .where(AdvisoryRun.farmer_id == fid)
+            .values(materialized_on=date(2000, 1, 1))
+        )
+        db.commit()
+    weather.forecast_cache.clear()
+    fetched.clear()
+    upstream["forecast"] = dry
+    assert texts() != rainy and fetched
@@ -0,0 +1,302 @@
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import ai
+
+
+client = TestClient(app)
+
+
+def mock_ollama(handler):
+    return httpx.AsyncClient(
+        base_url="http://ollama.test", transport=httpx.MockTransport(handler)
+    )
+
+
+def test_call_ollama_uses_configured_model():
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["path"] = request.url.path
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json={"response": "Drain the field."})
+
+    async def run():
+        async with mock_ollama(handler) as c:
+            return await ai.call_ollama("hello", c)
+
+    assert asyncio.run(run()) == "Drain the field."
+    assert seen["path"] == "/api/generate"
+    assert seen["body"]["model"] == ai.settings.OLLAMA_MODEL
+    assert seen["body"]["stream"] is False
+
+
+def test_call_ollama_connection_error_is_503():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    async def run():
+        async with mock_ollama(handler) as c:
+            return await ai.call_ollama("hello", c)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+    assert exc.value.status_code == 503
+
+
+def test_chat_endpoint_with_injected_client():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"response": "Wait two days to spray."})
+
+    r = client.post("/farmers/", json={"name": "Chat", "language": "en"})
+    fid = r.json()["id"]
+
+    async def override():
+        return mock_ollama(handler)
+
+    app.dependency_overrides[ai.ollama_client] = override
+    try:
+        r = client.post("/ai/chat", json={"question": "Rain?", "farmer_id": fid})
+    finally:
+        app.dependency_overrides.clear()
+    assert r.status_code == 200, r.text
+    assert r.json() == {"answer": "Wait two days to spray.", "farmer_id": fid}
+
+
+def test_chat_stream_forwards_tokens_as_sse():
+    lines = [
+        {"response": "Wait ", "done": False},
+        {"response": "two days.", "done": False},
+        {"response": "", "done": True},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        body = "\n".join(json.dumps(line) for line in lines) + "\n"
+        return httpx.Response(200, content=body.encode())
+
+    r = client.post("/farmers/", json={"name": "Stream", "language": "en"})
+    fid = r.json()["id"]
+
+    async def override():
+        return mock_ollama(handler)
+
+    app.dependency_overrides[ai.ollama_client] = override
+    try:
+        r = client.post(
+            "/ai/chat/stream", json={"question": "Rain?", "farmer_id": fid}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [e for e in r.text.split("\n\n") if e]
+    assert events[0] == 'data: {"token": "Wait "}'
+    assert events[1] == 'data: {"token": "two days."}'
+    assert events[2].startswith("event: done\n")
+    done = json.loads(events[2].split("data: ", 1)[1])
+    assert done == {"answer": "Wait two days.", "farmer_id": fid}
+
+
+def test_chat_stream_releases_slot_when_client_leaves_before_body():
+    from starlette.requests import ClientDisconnect
+
+    from app.db import AsyncSessionLocal
+    from app.schemas.ai import ChatRequest
+
+    closed = []
+
+    class Upstream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b'{"response": "Wait", "done": false}\n'
+
+        async def aclose(self):
+            closed.append(True)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=Upstream())
+
+    r = client.post("/farmers/", json={"name": "Gone", "language": "en"})
+    question = ChatRequest(question="Is it going to rain?", farmer_id=r.json()["id"])
+
+    async def send(message):
+        raise OSError("client went away")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def run():
+        async with AsyncSessionLocal() as db, mock_ollama(handler) as c:
+            response = await ai.chat_with_ai_stream(question, db, c)
+            assert ai.llm_scheduler._active == 1
+            scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+            with pytest.raises(ClientDisconnect):
+                await response(scope, receive, send)
+
+    asyncio.run(run())
+    assert ai.llm_scheduler._active == 0
+    assert closed == [True]
+
+def test_advise_is_served_from_prompt_cache():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"response": f"Advice #{len(calls)}"})
+
+    r = client.post(
+        "/farmers/", json={"name": "Cache", "language": "en", "crops": "banana"}
+    )
+    fid = r.json()["id"]
+
+    async def override():
+        return mock_ollama(handler)
+
+    app.dependency_overrides[ai.ollama_client] = override
+    try:
+        first = client.post(f"/ai/advise/{fid}")
+        second = client.post(f"/ai/advise/{fid}")
+        refreshed = client.post(f"/ai/advise/{fid}", params={"force_refresh": True})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200, first.text
+    assert second.json() == first.json()
+    assert refreshed.json()["text"] == "Advice #2"
+    assert len(calls) == 2
+
+
+def test_chat_reuses_answer_for_similar_question(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"response": "Skip spraying today."})
+
+    def fake_embed(text):
+        # "rain" questions map to one direction, everything else to another
+        return np.array([1.0, 0.0]) if "rain" in text.lower() else np.array([0.0, 1.0])
+
+    monkeypatch.setattr(ai.settings, "AI_SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai, "embed_question", fake_embed)
+    ai.semantic_cache.clear()
+
+    r = client.post("/farmers/", json={"name": "Semantic", "language": "en"})
+    fid = r.json()["id"]
+
+    async def override():
+        return mock_ollama(handler)
+
+    app.dependency_overrides[ai.ollama_client] = override
+    try:
+        questions = ["What to do after rain?", "Rain came, what now?", "Fertilizer?"]
+        answers = [
+            client.post("/ai/chat", json={"question": q, "farmer_id": fid}).json()
+            for q in questions
+        ]
+    finally:
+        app.dependency_overrides.clear()
+        ai.semantic_cache.clear()
+
+    assert answers[1]["answer"] == answers[0]["answer"] == "Skip spraying today."
+    assert len(calls) == 2
+
+
+def test_shared_answers_carry_no_personal_details(monkeypatch):
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["prompt"]
+        prompts.append(prompt)
+        # a model echoing whatever personal detail it is given
+        named = [n for n in ("Anu", "Babu", "Chandran") if n in prompt]
+        return httpx.Response(200, json={"response": f"Hello {named}. Drain it."})
+
+    monkeypatch.setattr(ai.settings, "AI_SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(ai, "embed_question", lambda text: np.array([1.0, 0.0]))
+    ai.semantic_cache.clear()
+
+    profile = {"language": "en", "crops": "banana", "soil_type": "clay"}
+    ids = [
+        client.post("/farmers/", json={"name": name, **profile, **where}).json()["id"]
+        for name, where in [
+            ("Anu", {"latitude": 9.5012, "longitude": 76.3421}),
+            ("Babu", {"latitude": 9.5034, "longitude": 76.3409}),
+            ("Chandran", {"latitude": 11.25, "longitude": 75.78}),
+        ]
+    ]
+
+    async def override():
+        return mock_ollama(handler)
+
+    app.dependency_overrides[ai.ollama_client] = override
+    try:
+        answers = [
+            client.post(
+                "/ai/chat", json={"question": "Rain?", "farmer_id": fid}
+            ).json()["answer"]
+            for fid in ids
+        ]
+    finally:
+        app.dependency_overrides.clear()
+        ai.semantic_cache.clear()
+
+    # Babu shares Anu's cell and is served the cached answer; Chandran,
+    # in another district, gets a fresh one
+    assert answers[0] == answers[1] == answers[2] == "Hello []. Drain it."
+    assert len(prompts) == 2
+    for prompt in prompts:
+        assert "9.5012" not in prompt and "Farmer " not in prompt
+
+
+def test_response_cache_evicts_in_periodic_sweeps(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import select
+
+    from app.config import settings
+    from app.db import AsyncSessionLocal, SessionLocal
+    from app.models.ai_cache import AIResponseCache
+    from app.services import ai_cache
+
+    monkeypatch.setattr(settings, "AI_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(settings, "AI_CACHE_EVICT_EVERY", 3)
+    monkeypatch.setattr(ai_cache.response_cache_stats, "since_sweep", 0)
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+
+    def keys():
+        with SessionLocal() as db:
+            return set(db.scalars(select(AIResponseCache.key)))
+
+    async def store(*names):
+        async with AsyncSessionLocal() as db:
+            for name in names:
+                await ai_cache.store_response(db, name, "m", name)
+
+    with SessionLocal() as db:
+        db.add(
+            AIResponseCache(
+                key="evict-stale",
+                model="m",
+                response="old",
+                created_at=stale,
+                expires_at=stale,
+            )
+        )
+        db.commit()
+    sweeps = ai_cache.response_cache_stats.sweeps
+    asyncio.run(store("evict-a", "evict-b"))
+    # below the sweep interval nothing is deleted, even past the cap
+    assert {"evict-stale", "evict-a", "evict-b"} <= keys()
+    assert ai_cache.response_cache_stats.sweeps == sweeps
+
+    asyncio.run(store("evict-c"))
+    assert ai_cache.response_cache_stats.sweeps == sweeps + 1
+    assert keys() == {"evict-b", "evict-c"}
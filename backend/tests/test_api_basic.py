@@ -44,3 +44,368 @@ def test_create_and_list_farmer():
     assert r2.status_code == 200
     farmers = r2.json()
     assert any(f["id"] == created["id"] for f in farmers)
+
+
+def test_list_farmers_pages_filters_and_projects():
+    ids = []
+    for i in range(5):
+        r = client.post(
+            "/farmers/",
+            json={
+                "name": f"Page {i}",
+                "language": "kn",
+                "soil_type": "laterite" if i % 2 else "alluvial",
+                "crops": "Paddy, Banana" if i < 3 else "Coconut",
+            },
+        )
+        ids.append(r.json()["id"])
+
+    seen, cursor = [], None
+    while True:
+        params = {"language": "kn", "limit": 2, "fields": "name"}
+        r = client.get(
+            "/farmers/", params={**params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert r.status_code == 200, r.text
+        assert all(set(f) == {"id", "name"} for f in r.json())
+        seen.extend(f["id"] for f in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+    r = client.get(
+        "/farmers/", params={"language": "kn", "crop": "rice", "soil_type": "laterite"}
+    )
+    assert [f["id"] for f in r.json()] == [ids[1]]
+    assert r.json()[0]["crops"] == "Paddy, Banana"
+
+    assert client.get("/farmers/", params={"fields": "id,password"}).status_code == 400
+    assert client.get("/farmers/", params={"limit": 10_000}).status_code == 422
+
+
+def test_activity_log_time_range_type_and_pages():
+    from datetime import datetime, timezone
+    from app.db import SessionLocal
+    from app.models import Activity
+
+    farmer = client.post("/farmers/", json={"name": "Log Farmer"}).json()
+    log = [(1, "sowing"), (5, "spray"), (9, "irrigation"), (12, "spray")]
+    with SessionLocal() as db:
+        for day, kind in log:
+            db.add(
+                Activity(
+                    farmer_id=farmer["id"],
+                    type=kind,
+                    at=datetime(2026, 6, day, 6, 0, tzinfo=timezone.utc),
+                )
+            )
+        db.commit()
+    url = f"/activities/by-farmer/{farmer['id']}"
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get(url, params=params)
+        assert r.status_code == 200, r.text
+        seen.extend(a["at"][:10] for a in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ["2026-06-12", "2026-06-09", "2026-06-05", "2026-06-01"]
+
+    # `from` inclusive, `to` exclusive; offsets are converted to UTC
+    r = client.get(
+        url,
+        params={"from": "2026-06-05T06:00:00Z", "to": "2026-06-12T11:30:00+05:30"},
+    )
+    assert [a["type"] for a in r.json()] == ["irrigation", "spray"]
+
+    r = client.get(url, params={"type": "spray,sowing", "from": "2026-06-02"})
+    assert [a["at"][:10] for a in r.json()] == ["2026-06-12", "2026-06-05"]
+
+    bad = {"from": "2026-06-12", "to": "2026-06-01"}
+    assert client.get(url, params=bad).status_code == 400
+    assert client.get(url, params={"cursor": "nope"}).status_code == 400
+
+
+def test_bulk_activities_stream_in_chunks_with_line_errors(monkeypatch):
+    import json
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ACTIVITY_BULK_CHUNK", 2)
+    farmer = client.post("/farmers/", json={"name": "Sync Farmer"}).json()
+    rows = [
+        {"farmer_id": farmer["id"], "type": "sowing", "at": "2026-06-01T06:00:00Z"},
+        {"farmer_id": farmer["id"], "type": "spray", "quantity": 2.5, "unit": "l"},
+        {"farmer_id": 10_000_000, "type": "spray"},
+        {"farmer_id": farmer["id"]},
+        {"farmer_id": farmer["id"], "type": "harvest"},
+    ]
+    lines = [json.dumps(r) for r in rows[:2]] + [""] + [json.dumps(r) for r in rows[2:]]
+    body = "\n".join(lines[:4]) + "\n{not json\n" + "\n".join(lines[4:])
+
+    r = client.post(
+        "/activities/bulk",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (6, 3, 3)
+    assert [e["line"] for e in result["errors"]] == [4, 5, 6]
+    assert "not found" in result["errors"][0]["error"]
+    assert result["errors"][2]["error"].startswith("type:")
+
+    logged = client.get(f"/activities/by-farmer/{farmer['id']}").json()
+    assert sorted(a["type"] for a in logged) == ["harvest", "sowing", "spray"]
+    assert [a["at"][:10] for a in logged][-1] == "2026-06-01"
+
+
+def test_crop_filter_follows_crop_edits():
+    from app.db import SessionLocal
+    from app.models import Farmer, FarmerCrop
+
+    fid = client.post(
+        "/farmers/", json={"name": "Crop Edit", "crops": "Paddy; Vazha"}
+    ).json()["id"]
+    with SessionLocal() as db:
+        farmer = db.get(Farmer, fid)
+        assert {c.crop_key for c in farmer.crop_rows} == {"rice", "banana"}
+        db.get(FarmerCrop, (fid, "rice")).season = "mundakan"
+        db.commit()
+        farmer.crops = "coconut, rice"
+        db.commit()
+        assert db.get(FarmerCrop, (fid, "rice")).season == "mundakan"
+
+    def grower_ids(crop):
+        r = client.get("/farmers/", params={"crop": crop, "fields": "id"})
+        return {f["id"] for f in r.json()}
+
+    assert fid in grower_ids("Coconut") and fid in grower_ids("നെല്ല്")
+    assert fid not in grower_ids("banana")
+
+
+def test_farmers_near_and_in_bbox():
+    from sqlalchemy import select
+
+    from app.db import SessionLocal
+    from app.models import Farmer
+    from app.services.farmer_filters import bbox_clause
+    from app.services.geo import geohash
+
+    # well away from the other tests' farmers; 0.045 deg of latitude ~ 5 km
+    ids = {}
+    for name, lat, crops in [
+        ("Centre", 30.0, "Paddy"),
+        ("North 5km", 30.045, "Coconut"),
+        ("North 15km", 30.135, "Paddy"),
+    ]:
+        ids[name] = client.post(
+            "/farmers/",
+            json={"name": name, "latitude": lat, "longitude": 60.0, "crops": crops},
+        ).json()["id"]
+    client.post("/farmers/", json={"name": "Nowhere"})
+    body = b'{"name": "Imported", "latitude": 30.0, "longitude": 60.09}\n'
+    assert client.post("/farmers/import", content=body).json()["inserted"] == 1
+
+    r = client.get("/farmers/near", params={"lat": 30.0, "lon": 60.0, "radius_km": 10})
+    assert r.status_code == 200
+    near = r.json()
+    assert [f["name"] for f in near] == ["Centre", "North 5km", "Imported"]
+    assert near[0]["distance_km"] == 0 and 4.9 < near[1]["distance_km"] < 5.1
+
+    params = {"lat": 30.0, "lon": 60.0, "radius_km": 10, "limit": 2}
+    first = client.get("/farmers/near", params=params)
+    params["cursor"] = first.headers["X-Next-Cursor"]
+    rest = client.get("/farmers/near", params=params).json()
+    assert [f["name"] for f in first.json() + rest] == [f["name"] for f in near]
+
+    paddy = client.get(
+        "/farmers/near",
+        params={"lat": 30.0, "lon": 60.0, "radius_km": 20, "crop": "rice"},
+    )
+    assert [f["name"] for f in paddy.json()] == ["Centre", "North 15km"]
+    in_language = client.get(
+        "/farmers/near",
+        params={"lat": 30.0, "lon": 60.0, "radius_km": 10, "language": "ml"},
+    )
+    assert [f["name"] for f in in_language.json()] == [f["name"] for f in near]
+
+    def in_bbox(bbox):
+        r = client.get("/farmers/", params={"bbox": bbox, "fields": "name"})
+        assert r.status_code == 200
+        return {f["name"] for f in r.json()}
+
+    assert in_bbox("29.99,59.99,30.1,60.1") == {"Centre", "North 5km", "Imported"}
+    assert client.get("/farmers/", params={"bbox": "30,60,29,61"}).status_code == 400
+    assert client.get("/farmers/", params={"bbox": "30,60"}).status_code == 400
+
+    # moving a farmer moves its index entry and geohash
+    with SessionLocal() as db:
+        farmer = db.get(Farmer, ids["North 15km"])
+        farmer.latitude = 30.05
+        db.commit()
+        assert farmer.geohash == geohash(30.05, 60.0)
+    assert "North 15km" in in_bbox("29.99,59.99,30.1,60.1")
+
+    # the geohash prefix search other backends use finds the same farmers
+    box = (29.99, 59.99, 30.1, 60.1)
+    with SessionLocal() as db:
+        found = {
+            backend: set(db.scalars(select(Farmer.id).where(bbox_clause(box, backend))))
+            for backend in ("sqlite", "postgresql")
+        }
+    assert found["sqlite"] == found["postgresql"] and len(found["sqlite"]) == 4
+
+
+def test_farmers_near_pages_are_full_when_the_index_bound_overshoots():
+    # Edge is 10.07 km to the south-east: inside the search box and the
+    # index's slightly generous bound, but outside the 10 km radius
+    for name, lat, lon in [
+        ("A", -30.0, -60.0),
+        ("B", -30.02, -60.0),
+        ("C", -30.04, -60.0),
+        ("Edge", -30.064, -59.926),
+    ]:
+        client.post("/farmers/", json={"name": name, "latitude": lat, "longitude": lon})
+    params = {"lat": -30.0, "lon": -60.0, "radius_km": 10, "limit": 2}
+    first = client.get("/farmers/near", params=params)
+    assert [f["name"] for f in first.json()] == ["A", "B"]
+    params["cursor"] = first.headers["X-Next-Cursor"]
+    rest = client.get("/farmers/near", params=params)
+    assert [f["name"] for f in rest.json()] == ["C"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    params = {"lat": -30.0, "lon": -60.0, "radius_km": 10, "limit": 3}
+    page = client.get("/farmers/near", params=params)
+    assert [f["name"] for f in page.json()] == ["A", "B", "C"]
+    assert "X-Next-Cursor" not in page.headers
+
+
+def test_farmer_import_csv_upserts_by_phone(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "FARMER_IMPORT_CHUNK", 2)
+    existing = client.post(
+        "/farmers/", json={"name": "Old Name", "phone": "+91-700000001"}
+    ).json()
+    body = (
+        "\ufeffname,phone,language,latitude,crops\r\n"
+        'Asha,+91-700000001,ml,10.5,"Paddy, Banana"\r\n'
+        "Biju,+91-700000002,ml,not-a-number,\r\n"
+        ",+91-700000003,ml,,\r\n"
+        'Chitra,+91-700000004,ta,,"Coconut,\n Pepper"\r\n'
+        "Chitra K,+91-700000004,ta,,Coconut\r\n"
+        "Devi,,ml,,\r\n"
+    )
+    r = client.post(
+        "/farmers/import", content=body.encode(), headers={"Content-Type": "text/csv"}
+    )
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert (result["received"], result["failed"]) == (6, 2)
+    assert (result["inserted"], result["updated"]) == (2, 2)
+    assert [e["line"] for e in result["errors"]] == [3, 4]
+    assert result["errors"][0]["error"].startswith("latitude:")
+
+    updated = client.get(f"/farmers/{existing['id']}").json()
+    assert (updated["name"], updated["latitude"]) == ("Asha", 10.5)
+    assert updated["crops"] == "Paddy, Banana"
+    listed = client.get("/farmers/", params={"language": "ta"}).json()
+    names = {f["name"] for f in listed}
+    assert "Chitra K" in names and "Chitra" not in names
+
+    # bulk-written farmers are indexed by crop too
+    growers = client.get("/farmers/", params={"crop": "banana", "fields": "name"})
+    assert "Asha" in {f["name"] for f in growers.json()}
+
+    ndjson = '{"name": "Eapen", "phone": "+91-700000002"}\n{"phone": 5}\n'
+    r = client.post("/farmers/import?format=ndjson", content=ndjson.encode())
+    assert (r.json()["inserted"], r.json()["failed"]) == (1, 1)
+
+
+def test_farmer_reimport_only_updates_given_columns():
+    from app.db import SessionLocal
+    from app.models import Farmer
+    from app.services.geo import geohash
+
+    profile = {
+        "name": "Full Profile",
+        "phone": "+91-700000999",
+        "language": "en",
+        "latitude": 31.0,
+        "longitude": 61.0,
+        "soil_type": "laterite",
+        "crops": "Pepper",
+    }
+    fid = client.post("/farmers/", json=profile).json()["id"]
+    r = client.post(
+        "/farmers/import",
+        content=b"name,phone\nA Renamed,+91-700000999\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert r.json()["updated"] == 1
+    farmer = client.get(f"/farmers/{fid}").json()
+    assert {k: farmer[k] for k in profile} == {**profile, "name": "A Renamed"}
+    near = client.get("/farmers/near", params={"lat": 31, "lon": 61, "radius_km": 1})
+    assert [f["id"] for f in near.json()] == [fid]
+    growers = client.get("/farmers/", params={"crop": "pepper", "fields": "id"})
+    assert fid in {f["id"] for f in growers.json()}
+
+    # one coordinate moves the farmer against its stored other half
+    body = b'{"name": "A Renamed", "phone": "+91-700000999", "latitude": 31.5}\n'
+    client.post("/farmers/import", content=body)
+    with SessionLocal() as db:
+        assert db.get(Farmer, fid).geohash == geohash(31.5, 61.0)
+    near = client.get("/farmers/near", params={"lat": 31.5, "lon": 61, "radius_km": 1})
+    assert [f["id"] for f in near.json()] == [fid]
+
+
+def test_export_streams_tables_as_ndjson_csv_and_gzip(monkeypatch):
+    import asyncio
+    import csv
+    import gzip
+    import io
+    import json
+    from app.config import settings
+    from app.services.export import _ndjson
+
+    monkeypatch.setattr(settings, "EXPORT_YIELD_PER", 2)
+    created = [
+        client.post("/farmers/", json={"name": f"Export {i}", "crops": "Paddy, Banana"})
+        for i in range(3)
+    ]
+    ids = {r.json()["id"] for r in created}
+
+    r = client.get("/export/farmers")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert ids <= {row["id"] for row in rows}
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert len({row["id"] for row in rows}) == len(rows)
+
+    r = client.get("/export/farmers", params={"format": "csv", "gzip": "true"})
+    assert r.headers["content-disposition"].endswith('filename="farmers.csv.gz"')
+    table = list(csv.DictReader(io.StringIO(gzip.decompress(r.content).decode())))
+    assert len(table) == len(rows)
+    assert {row["crops"] for row in table if int(row["id"]) in ids} == {"Paddy, Banana"}
+    # one timestamp format whichever the file format
+    by_id = {row["id"]: row for row in rows}
+    assert all(
+        row["created_at"] == by_id[int(row["id"])]["created_at"] for row in table
+    )
+    assert "T" in table[0]["created_at"]
+
+    # non-finite floats are not valid JSON: they export as null
+    async def partitions():
+        yield [(1, float("nan"), float("inf"))]
+
+    async def collect():
+        return b"".join([c async for c in _ndjson(["id", "lat", "lon"], partitions())])
+
+    assert json.loads(asyncio.run(collect())) == {"id": 1, "lat": None, "lon": None}
+
+    assert client.get("/export/users").status_code == 422
+    assert client.get("/export/farmers", params={"format": "xml"}).status_code == 422
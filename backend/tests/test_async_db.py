@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import select
+
+from app.db import (
+    SessionLocal,
+    async_database_url,
+    engine,
+    is_sqlite_file,
+    write_engine,
+    writer_lane,
+)
+from app.models import Activity, Farmer
+
+
+def test_async_url_for_sqlite_and_postgres():
+    assert async_database_url("sqlite:///./krishisakhi.db") == (
+        "sqlite+aiosqlite:///./krishisakhi.db"
+    )
+    assert async_database_url("postgresql://ks:secret@db:5432/ks") == (
+        "postgresql+asyncpg://ks:secret@db:5432/ks"
+    )
+    assert async_database_url("postgresql+psycopg2://ks@db/ks") == (
+        "postgresql+asyncpg://ks@db/ks"
+    )
+
+
+def test_async_url_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        async_database_url("mysql://ks@db/ks")
+
+
+def test_writer_lane_only_for_sqlite_files():
+    assert is_sqlite_file("sqlite:///./krishisakhi.db")
+    assert not is_sqlite_file("sqlite://")
+    assert not is_sqlite_file("sqlite:///:memory:")
+    assert not is_sqlite_file("postgresql://ks@db/ks")
+
+
+def test_sqlite_runs_in_wal_with_pragmas():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_writes_go_through_the_writer_lane_and_reads_do_not():
+    with SessionLocal() as db:
+        assert db.get_bind(clause=select(Farmer)) is engine
+        before = writer_lane.transactions
+        farmer = Farmer(name="Lane Farmer")
+        db.add(farmer)
+        db.commit()
+        db.add(Activity(farmer_id=farmer.id, type="sowing"))
+        db.commit()
+        assert writer_lane.transactions == before + 2
+        # the reader sees the writer's committed rows
+        stmt = select(Activity.type).where(Activity.farmer_id == farmer.id)
+        assert db.scalar(stmt) == "sowing"
+    assert write_engine.pool.size() == 1
+    assert write_engine.pool.checkedout() == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from app.models.farmer import Farmer
+from app.services.crops import Crop, CropRegistry, crop_registry
+from app.services.rule_engine import default_ruleset
+
+
+def test_synonyms_and_malayalam_resolve_to_one_key():
+    for name in ["Banana", " BANANAS ", "Nendran", "വാഴ", "plantain"]:
+        assert crop_registry.resolve(name) == "banana"
+    assert crop_registry.resolve("Paddy") == "rice"
+    assert crop_registry.resolve("നെല്ല്") == "rice"
+    # crops without a KB entry still get a stable key
+    assert crop_registry.resolve("  Black   Pepper ") == "black pepper"
+
+
+def test_parse_splits_dedupes_and_is_cached():
+    assert crop_registry.parse("Paddy, banana; Rice/വാഴ") == ("rice", "banana")
+    assert crop_registry.parse(None) == crop_registry.parse("") == ()
+    before = crop_registry.parse.cache_info().hits
+    assert Farmer(crops="Paddy, Banana").crop_keys == ("rice", "banana")
+    assert Farmer(crops="Paddy, Banana").crop_keys == ("rice", "banana")
+    assert crop_registry.parse.cache_info().hits > before
+
+
+def test_crop_rules_match_by_key_not_substring():
+    texts = [
+        [a["text"] for a in advs]
+        for advs in default_ruleset.evaluate(
+            [{}], [("banana",), ("bananas",), ("rice",)], forecast_index=[0, 0, 0]
+        )
+    ]
+    assert texts[0][0].startswith("Banana:")
+    # an unresolved crop key no longer matches on a substring
+    assert texts[1] == texts[2] == [default_ruleset.fallback.render()["text"]]
+    assert "banana" in default_ruleset.crop_index
+
+
+def test_conflicting_aliases_are_rejected():
+    with pytest.raises(ValueError):
+        CropRegistry(
+            [Crop("banana", "Banana", ("plantain",)), Crop("plantain", "Plantain")]
+        )
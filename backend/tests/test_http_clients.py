@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.http_clients import HTTPClientRegistry, Upstream
+
+
+def test_each_loop_gets_its_own_clients_closed_at_loop_shutdown():
+    registry = HTTPClientRegistry({"geo": Upstream()})
+
+    async def use():
+        client = registry.get("geo")
+        assert registry.get("geo") is client
+        return client
+
+    first = asyncio.run(use())
+    second = asyncio.run(use())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert registry._clients == {} and registry._closers == {}
+
+
+def test_aclose_closes_the_running_loops_clients():
+    registry = HTTPClientRegistry({"geo": Upstream(), "ollama": Upstream()})
+
+    async def run():
+        registry.open()
+        clients = list(registry._clients[asyncio.get_running_loop()].values())
+        await registry.aclose()
+        return clients
+
+    clients = asyncio.run(run())
+    assert len(clients) == 2
+    assert all(client.is_closed for client in clients)
+
+
+def test_test_client_loops_do_not_leak_pools():
+    from app.services.http_clients import http_clients
+
+    with TestClient(app) as client:
+        assert client.get("/healthz").status_code == 200
+    assert http_clients._clients == {}
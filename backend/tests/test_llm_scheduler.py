@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, QueueFull
+
+
+def make_scheduler(**limits):
+    return LLMScheduler(
+        max_concurrency=1,
+        queue_limits={
+            INTERACTIVE: limits.get("interactive", 4),
+            BATCH: limits.get("batch", 4),
+        },
+    )
+
+
+def test_interactive_waiters_jump_batch_waiters():
+    sched = make_scheduler()
+    order = []
+
+    async def job(lane, name, gate=None):
+        async with sched.slot(lane):
+            order.append(name)
+            if gate is not None:
+                await gate.wait()
+
+    async def run():
+        gate = asyncio.Event()
+        holder = asyncio.create_task(job(BATCH, "holder", gate))
+        await asyncio.sleep(0)
+        waiting = [
+            asyncio.create_task(job(BATCH, "batch-1")),
+            asyncio.create_task(job(BATCH, "batch-2")),
+            asyncio.create_task(job(INTERACTIVE, "chat")),
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *waiting)
+
+    asyncio.run(run())
+    assert order == ["holder", "chat", "batch-1", "batch-2"]
+    stats = sched.stats()
+    assert stats["active"] == 0
+    assert stats["lanes"][BATCH]["completed"] == 3
+
+
+def test_full_lane_is_rejected_with_retry_after():
+    sched = make_scheduler(batch=1)
+
+    async def run():
+        started = await sched.acquire(BATCH)
+        queued = asyncio.create_task(sched.acquire(BATCH))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull) as exc:
+            await sched.acquire(BATCH)
+        assert exc.value.retry_after >= 1
+        # the interactive lane has its own budget
+        chat = asyncio.create_task(sched.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        sched.release(BATCH, started)
+        sched.release(INTERACTIVE, await chat)
+        sched.release(BATCH, await queued)
+
+    asyncio.run(run())
+    stats = sched.stats()
+    assert stats["lanes"][BATCH]["rejected"] == 1
+    assert stats["active"] == 0
+
+
+def test_cancelled_waiter_frees_its_queue_place():
+    sched = make_scheduler(interactive=1)
+
+    async def run():
+        started = await sched.acquire(INTERACTIVE)
+        waiter = asyncio.create_task(sched.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert sched.stats()["lanes"][INTERACTIVE]["queued"] == 0
+        sched.release(INTERACTIVE, started)
+
+    asyncio.run(run())
+    assert sched.stats()["active"] == 0
@@ -0,0 +1,67 @@
+from app.services.advisory_engine import build_advisories
+from app.services.rule_engine import Rule, RuleSet, default_ruleset
+
+
+def texts(advs):
+    return [a["text"].split(".")[0] for a in advs]
+
+
+def test_default_rules_match_single_farmer_semantics():
+    weather = {
+        "daily": {
+            "precipitation_sum": [0, 5.0, 0],
+            "temperature_2m_max": [30, 35.2, 31, 40],  # day 4 is outside the window
+            "temperature_2m_min": [20, 19, None],
+        }
+    }
+    assert texts(build_advisories({"crops": "Paddy, Banana"}, weather)) == [
+        "Heavy rain likely tomorrow",
+        "High temperatures expected in next 3 days",
+        "Banana: Propping recommended before strong winds; maintain drainage to avoid waterlogging",
+    ]
+
+
+def test_missing_data_never_fires_and_falls_back():
+    for weather in (
+        {},
+        {"daily": {"precipitation_sum": [12]}},
+        {"daily": {"temperature_2m_min": [None, None]}},
+    ):
+        advs = build_advisories({"crops": ""}, weather)
+        assert texts(advs) == ["No critical alerts"]
+
+
+def test_batch_evaluation_shares_cell_forecasts():
+    hot = {"daily": {"temperature_2m_max": [36, 30, 30]}}
+    mild = {"daily": {"temperature_2m_max": [28, 29, 30]}}
+    crops = [("banana",), (), ("rice",), ("banana",)]
+    results = default_ruleset.evaluate([hot, mild], crops, forecast_index=[0, 0, 1, 1])
+    assert [len(r) for r in results] == [2, 1, 1, 1]
+    assert results[1] == build_advisories({"crops": ""}, hot)
+    assert results[3] == build_advisories({"crops": "banana"}, mild)
+
+
+def test_templates_and_custom_aggregations():
+    ruleset = RuleSet(
+        [
+            Rule.from_dict(
+                {
+                    "id": "wet_week",
+                    "variable": "precipitation_sum",
+                    "window": [0, 7],
+                    "aggregation": "sum",
+                    "op": ">",
+                    "threshold": 50,
+                    "severity": "warn",
+                    "text": "{value:.0f} mm of rain this week.",
+                }
+            )
+        ]
+    )
+    forecasts = [{"daily": {"precipitation_sum": [10] * 7}}, {"daily": {}}]
+    results = ruleset.evaluate(forecasts, ["", ""])
+    assert results == [
+        [{"text": "70 mm of rain this week.", "severity": "warn", "source": "rule"}],
+        [],
+    ]
+    assert ruleset.evaluate([], []) == []
@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.services import semantic_cache as sc
+from app.services.semantic_cache import SemanticAnswerCache
+
+
+def unit(*xs):
+    v = np.asarray(xs, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_near_duplicate_hits_within_bucket_only():
+    cache = SemanticAnswerCache(threshold=0.9, max_per_bucket=4, ttl_seconds=60)
+    cache.store("en|banana", unit(1, 0, 0), "Drain the field.")
+    assert cache.lookup("en|banana", unit(1, 0.1, 0)) == "Drain the field."
+    assert cache.lookup("en|banana", unit(0, 1, 0)) is None
+    assert cache.lookup("ml|banana", unit(1, 0, 0)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_ring_overwrites_oldest_and_honours_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sc.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(threshold=0.99, max_per_bucket=2, ttl_seconds=60)
+    cache.store("b", unit(1, 0, 0), "a")
+    cache.store("b", unit(0, 1, 0), "b")
+    cache.store("b", unit(0, 0, 1), "c")
+    assert cache.lookup("b", unit(1, 0, 0)) is None
+    assert cache.lookup("b", unit(0, 0, 1)) == "c"
+    assert cache.stats()["evictions"] == 1
+    now[0] += 61
+    assert cache.lookup("b", unit(0, 0, 1)) is None
+
+
+def test_bucket_count_is_capped_lru_first_and_dead_buckets_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sc.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(
+        threshold=0.99, max_per_bucket=2, ttl_seconds=600, max_buckets=2
+    )
+    cache.store("a", unit(1, 0, 0), "a")
+    cache.store("b", unit(1, 0, 0), "b")
+    assert cache.lookup("a", unit(1, 0, 0)) == "a"  # "b" is now least recent
+    cache.store("c", unit(1, 0, 0), "c")
+    assert cache.lookup("b", unit(1, 0, 0)) is None
+    assert cache.lookup("a", unit(1, 0, 0)) == "a"
+    assert cache.stats()["bucket_evictions"] == 1
+
+    # once every entry of a bucket has expired, the next sweep drops it
+    now[0] += 601
+    cache.store("d", unit(1, 0, 0), "d")
+    stats = cache.stats()
+    assert (stats["buckets"], stats["buckets_expired"]) == (1, 2)
+    assert stats["bucket_evictions"] == 1
@@ -0,0 +1,100 @@
+import asyncio
+
+from app.services import weather
+from app.services.weather import ForecastCache, grid_cell
+
+
+def test_grid_cell_buckets_nearby_points():
+    assert grid_cell(10.01, 76.26, step=0.05) == grid_cell(10.04, 76.29, step=0.05)
+    assert grid_cell(10.01, 76.26, step=0.05) != grid_cell(10.06, 76.26, step=0.05)
+    assert grid_cell(0.15, 0.0, step=0.05) == (3, 0)
+
+
+def test_cache_lru_eviction():
+    cache = ForecastCache(max_entries=2, ttl_seconds=3600)
+    cache.put((1, 1), {"a": 1})
+    cache.put((2, 2), {"b": 2})
+    assert cache.get((1, 1)) == {"a": 1}  # (1, 1) is now most recent
+    cache.put((3, 3), {"c": 3})
+    assert cache.get((2, 2)) is None
+    assert cache.get((1, 1)) == {"a": 1}
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_cache_expires_at_ttl_boundary(monkeypatch):
+    now = [7200.0 + 3000]
+    monkeypatch.setattr(weather.time, "time", lambda: now[0])
+    cache = ForecastCache(max_entries=8, ttl_seconds=3600)
+    cache.put((1, 1), {"a": 1})
+    now[0] = 7200.0 + 3599
+    assert cache.get((1, 1)) == {"a": 1}
+    now[0] = 7200.0 + 3600
+    assert cache.get((1, 1)) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_get_forecast_fetches_each_cell_once(monkeypatch):
+    calls = []
+
+    async def fake_fetch(client, lat, lon):
+        calls.append((lat, lon))
+        return {"daily": {}}
+
+    monkeypatch.setattr(weather, "_fetch_forecast", fake_fetch)
+    weather.forecast_cache.clear()
+
+    async def run():
+        await weather.get_forecast(10.01, 76.26)
+        await weather.get_forecast(10.02, 76.27)
+        await weather.get_forecast(11.50, 76.27)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    weather.forecast_cache.clear()
+
+
+def test_concurrent_misses_share_one_fetch(monkeypatch):
+    calls = []
+
+    async def slow_fetch(client, lat, lon):
+        calls.append((lat, lon))
+        await asyncio.sleep(0.01)
+        return {"daily": {"precipitation_sum": [0, 1]}}
+
+    monkeypatch.setattr(weather, "_fetch_forecast", slow_fetch)
+    weather.forecast_cache.clear()
+
+    async def run():
+        return await asyncio.gather(
+            *(weather.get_forecast(10.01 + i * 0.001, 76.26) for i in range(20))
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert weather.forecast_flight.stats()["inflight"] == 0
+    weather.forecast_cache.clear()
+
+
+def test_failed_fetch_is_not_cached(monkeypatch):
+    async def failing_fetch(client, lat, lon):
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(weather, "_fetch_forecast", failing_fetch)
+    weather.forecast_cache.clear()
+
+    async def run():
+        return await asyncio.gather(
+            weather.get_forecast(10.01, 76.26),
+            weather.get_forecast(10.02, 76.26),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(weather.forecast_cache) == 0
+    assert weather.forecast_flight.stats()["inflight"] == 0
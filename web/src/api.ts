@@ -28,4 +28,21 @@ export async function api<T = any>(path: string, opts: Options = {}): Promise<T>
     console.error('[API NETWORK ERROR]', url, e);
     throw new Error(`Network error calling ${url}: ${e?.message || e}`);
   }
-}
\ No newline at end of file
+}
+
+// List endpoints return one page and put the next page's cursor in this
+// header; no header means the last page.
+export const CURSOR_HEADER = 'X-Next-Cursor';
+
+export async function apiAll<T = any>(path: string): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const sep = path.includes('?') ? '&' : '?';
+    const page = cursor ? `${path}${sep}cursor=${encodeURIComponent(cursor)}` : path;
+    const res = await api<Response>(page, { raw: true });
+    items.push(...((await res.json()) as T[]));
+    cursor = res.headers.get(CURSOR_HEADER);
+  } while (cursor);
+  return items;
+}
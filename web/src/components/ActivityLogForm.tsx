@@ -1,14 +1,11 @@
 'use client'
 
 import { useState, useEffect } from 'react'
-import { api } from '../api'
+import { api, apiAll } from '../api'
 
 interface Farmer {
   id: number
   name: string
-  phone: string
-  village: string
-  crops?: string
 }
 
 interface Activity {
@@ -28,7 +25,7 @@ export default function ActivityLogForm() {
   const [loading, setLoading] = useState(false)
   const [activitiesLoading, setActivitiesLoading] = useState(false)
 
-  useEffect(() => { api<Farmer[]>('/farmers/').then(setFarmers) }, [])
+  useEffect(() => { apiAll<Farmer>('/farmers/?fields=id,name&limit=200').then(setFarmers) }, [])
   
   useEffect(() => { 
     if (selected) {
@@ -1,6 +1,6 @@
 'use client'
 import { useEffect, useState } from 'react'
-import { api } from '../api'
+import { api, apiAll } from '../api'
 
 type Farmer = { id: number, name: string }
 type Advisory = { id: number, farmer_id: number, text: string, severity: string, source: string }
@@ -12,7 +12,7 @@ export default function AdvisoryFeed() {
   const [loading, setLoading] = useState(false)
 
   useEffect(() => { 
-    api<Farmer[]>('/farmers/').then(setFarmers).catch(console.error)
+    apiAll<Farmer>('/farmers/?fields=id,name&limit=200').then(setFarmers).catch(console.error)
   }, [])
 
   async function generate() {
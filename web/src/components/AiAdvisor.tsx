@@ -1,7 +1,7 @@
 'use client'
 
 import { useEffect, useState } from 'react'
-import { api } from '../api'
+import { api, apiAll } from '../api'
 
 type Farmer = { id: number; name: string }
 type Advisory = { id: number; text: string; source: string; severity: string }
@@ -24,7 +24,7 @@ export default function AIAdvisor({ onAdvisoryGenerated }: AIAdvisorProps) {
   const [weatherLoading, setWeatherLoading] = useState(false)
 
   useEffect(() => {
-    api<Farmer[]>('/farmers/').then(setFarmers).catch(console.error)
+    apiAll<Farmer>('/farmers/?fields=id,name&limit=200').then(setFarmers).catch(console.error)
   }, [])
 
   async function generateAdvisory() {